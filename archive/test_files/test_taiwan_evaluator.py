@@ -5,6 +5,8 @@
 """
 import sys
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # 添加專案根目錄到 Python 路徑
@@ -14,25 +16,16 @@ if project_root not in sys.path:
 
 from scripts.evaluation.taiwan_meeting_evaluator import TaiwanMeetingEvaluator
 
-def test_taiwan_meeting_evaluator():
-    """測試台灣會議記錄評估器"""
-    print("=" * 50)
-    print("台灣會議記錄評估器測試")
-    print("=" * 50)
-    
-    # 初始化評估器
-    evaluator = TaiwanMeetingEvaluator()
-    
-    # 測試用例
-    test_cases = [
-        ("簡陋版", "今天開會討論了一些事情。"),
-        ("標準版", """# 會議記錄
+# 測試用例
+_RAW_CASES = [
+    ("簡陋版", "今天開會討論了一些事情。"),
+    ("標準版", """# 會議記錄
         會議時間：2024年5月28日
         與會人員：市長、各局處首長
         討論事項：市政預算
         決議事項：通過2024年度預算案
         行動項目：請財政局於6月底前完成預算分配"""),
-        ("完整版", """# 第671次市政會議會議紀錄
+    ("完整版", """# 第671次市政會議會議紀錄
         會議時間：113年5月28日上午9時
         會議地點：市政府第一會議室
         主持人：市長
@@ -50,28 +43,54 @@ def test_taiwan_meeting_evaluator():
         | 項目 | 負責人 | 期限 | 狀態 |
         |------|--------|------|------|
         | 預算重新分配 | 財政局長 | 6月30日 | 進行中 |""")
-    ]
+]
+
+# 預先計算 (名稱, 文本, 長度)，模組載入時建立一次
+TEST_CASES = tuple((name, text, len(text)) for name, text in _RAW_CASES)
+
+def test_taiwan_meeting_evaluator():
+    """測試台灣會議記錄評估器"""
+    print("=" * 50)
+    print("台灣會議記錄評估器測試")
+    print("=" * 50)
     
-    # 執行測試
-    for name, text in test_cases:
-        print(f"\n{name}:")
-        print("-" * 50)
-        print(f"文本長度: {len(text)} 字元")
-        
-        # 評估文本
+    # 初始化評估器（單獨計時，不計入各用例的評估時間）
+    init_start = time.perf_counter()
+    evaluator = TaiwanMeetingEvaluator()
+    print(f"評估器初始化: {(time.perf_counter() - init_start) * 1000:.1f} ms")
+    
+    def timed_evaluate(text):
+        start = time.perf_counter()
         scores = evaluator.evaluate("", text)  # 使用空字符串作為參考文本
-        
-        # 輸出評分結果
-        print(f"結構完整性: {scores.get('structure_score', 0):.3f}")
-        print(f"台灣語境適配: {scores.get('taiwan_context_score', 0):.3f}")
-        print(f"行動項目具體性: {scores.get('action_specificity_score', 0):.3f}")
-        print(f"綜合分數: {scores.get('taiwan_meeting_score', 0):.3f}")
+        return scores, time.perf_counter() - start
+    
+    # 執行評估；多個用例並行評估，單一用例則直接呼叫
+    texts = [text for _, text, _ in TEST_CASES]
+    if len(texts) == 1:
+        all_results = [timed_evaluate(texts[0])]
+    else:
+        with ThreadPoolExecutor(max_workers=len(texts)) as executor:
+            # map 依輸入順序返回結果，評估中的例外也會在此重新拋出
+            all_results = list(executor.map(timed_evaluate, texts))
+    
+    # 依原順序輸出結果，每個用例組成一段文字後一次寫出
+    for (name, _, text_len), (scores, elapsed) in zip(TEST_CASES, all_results):
+        lines = [
+            f"\n{name}:",
+            "-" * 50,
+            f"文本長度: {text_len} 字元",
+            f"評估時間: {elapsed * 1000:.2f} ms",
+            f"結構完整性: {scores.get('structure_score', 0):.3f}",
+            f"台灣語境適配: {scores.get('taiwan_context_score', 0):.3f}",
+            f"行動項目具體性: {scores.get('action_specificity_score', 0):.3f}",
+            f"綜合分數: {scores.get('taiwan_meeting_score', 0):.3f}",
+        ]
         
         # 輸出詳細評分（如果可用）
         if 'details' in scores:
-            print("\n詳細評分:")
-            for k, v in scores['details'].items():
-                print(f"  - {k}: {v}")
+            lines.append("\n詳細評分:")
+            lines.extend(f"  - {k}: {v}" for k, v in scores['details'].items())
+        sys.stdout.write("\n".join(lines) + "\n")
     
     print("\n測試完成！")
 
@@ -6,15 +6,55 @@
 """
 
 import os
-import json
 import time
+import asyncio
+import atexit
+import functools
 import logging
+import logging.handlers
+import queue
 import argparse
 import subprocess
+import sys
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass
+from typing import Dict, List, Any, Optional, Set, Tuple
+from dataclasses import dataclass, field
+
+import numpy as np
+
+# 直接在程序內調用優化器，各配置共用已載入的模組；報告以 llm_utils.write_json 原子寫入
+try:
+    from scripts.iterative_optimizer import OptimizationConfig, run as run_optimizer
+    from scripts.llm_utils import write_json
+except ImportError:
+    sys.path.append(str(Path(__file__).resolve().parents[2]))
+    from scripts.iterative_optimizer import OptimizationConfig, run as run_optimizer
+    from scripts.llm_utils import write_json
+
+# 測試狀態對應的總結欄位，未列出的狀態計入 unknown_tests
+_STATUS_TO_FIELD = {
+    "success": "successful_tests",
+    "failed": "failed_tests",
+    "error": "failed_tests",
+    "timeout": "timeout_tests"
+}
+
+def _summarize_optimizer_run(run_result: Dict[str, Any]) -> Dict[str, Any]:
+    """彙整 iterative_optimizer.run 的結果：各逐字稿的輪數與分數，以及整體平均"""
+    transcripts = run_result.get("transcripts", {})
+    best_scores = [t["best_score"] for t in transcripts.values()]
+    return {
+        "parsing_status": "parsed" if transcripts else "no_results",
+        "transcripts": transcripts,
+        "transcripts_completed": len(best_scores),
+        "average_best_score": sum(best_scores) / len(best_scores) if best_scores else None,
+        "total_iterations": sum(t["iterations"] for t in transcripts.values()),
+        "errors": run_result.get("errors", [])
+    }
 
 @dataclass
 class ModelConfig:
@@ -25,6 +65,25 @@ class ModelConfig:
     embedding_model: str = "nomic-embed-text:latest"
     description: str = ""
     expected_improvements: Optional[Dict[str, Any]] = None  # 改為 Optional 和 Any 類型
+    # 由 expected_improvements 展開的常用欄位，報告與排名時直接讀取
+    quality_improvement: float = 0.0
+    stability_sigma: float = 1.0
+    model_rating: int = 0
+    context_length: int = 0
+    technical_advantages: Tuple[str, ...] = field(default_factory=tuple)
+    
+    def __post_init__(self):
+        if self.expected_improvements:
+            expected = self.expected_improvements
+            self.quality_improvement = expected.get("quality_improvement", self.quality_improvement)
+            self.stability_sigma = expected.get("stability_sigma", self.stability_sigma)
+            self.model_rating = expected.get("model_rating", self.model_rating)
+            self.context_length = expected.get("context_length", self.context_length)
+            # 各配置重複出現的優勢描述統一駐留為同一字串物件，並與 expected_improvements 共用同一個 tuple
+            self.technical_advantages = tuple(
+                sys.intern(advantage) for advantage in expected.get("technical_advantages", self.technical_advantages)
+            )
+            expected["technical_advantages"] = self.technical_advantages
 
 class ModelConfigurationTester:
     """模型配置測試器"""
@@ -36,8 +95,19 @@ class ModelConfigurationTester:
         # 設置日誌
         self.logger = self._setup_logger()
         
+        # 已安裝模型快取（測試過程中模型清單不變，只需查詢一次）
+        self._available_models: Optional[Set[str]] = None
+        self._available_digests: Dict[str, str] = {}
+        self._models_lock = threading.Lock()
+        
+        # 全面測試過程中累計的各狀態次數
+        self._status_counter: Counter = Counter()
+        
         # 定義測試配置
         self.test_configs = self._define_test_configurations()
+        self._configs_by_name: Dict[str, ModelConfig] = {c.name: c for c in self.test_configs}
+        if len(self._configs_by_name) != len(self.test_configs):
+            raise ValueError("測試配置名稱重複")
         
     def _setup_logger(self) -> logging.Logger:
         """設置日誌"""
@@ -47,10 +117,15 @@ class ModelConfigurationTester:
         if logger.hasHandlers():
             logger.handlers.clear()
             
-        # 文件處理器
+        # 文件處理器：由背景執行緒寫檔，記錄日誌時只需放入佇列
         log_file = self.output_dir / "model_config_test.log"
         file_handler = logging.FileHandler(log_file, encoding="utf-8")
         file_handler.setLevel(logging.DEBUG)
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+        self._log_file_handler = file_handler
+        self._log_listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+        self._log_listener.start()
+        atexit.register(self.close)
         
         # 控制台處理器
         console_handler = logging.StreamHandler()
@@ -61,10 +136,18 @@ class ModelConfigurationTester:
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
         
-        logger.addHandler(file_handler)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
         logger.addHandler(console_handler)
         
         return logger
+    
+    def close(self) -> None:
+        """停止背景日誌執行緒，寫出佇列中剩餘的日誌並關閉日誌檔"""
+        listener = getattr(self, "_log_listener", None)
+        if listener is not None:
+            self._log_listener = None
+            listener.stop()
+            self._log_file_handler.close()
         
     def _define_test_configurations(self) -> List[ModelConfig]:
         """定義測試模型配置
@@ -163,8 +246,12 @@ class ModelConfigurationTester:
             )
         ]
     
-    def check_model_availability(self, model_name: str) -> bool:
-        """檢查模型是否可用"""
+    def get_config(self, config_name: str) -> Optional[ModelConfig]:
+        """依名稱取得測試配置，找不到時返回 None"""
+        return self._configs_by_name.get(config_name)
+    
+    def _refresh_available_models(self) -> Optional[Set[str]]:
+        """執行一次 ollama list 並快取已安裝模型名稱；失敗時不快取，下次重試"""
         try:
             result = subprocess.run(
                 ["ollama", "list"],
@@ -172,23 +259,52 @@ class ModelConfigurationTester:
                 text=True,
                 timeout=30
             )
-            
-            if result.returncode == 0:
-                available_models = result.stdout
-                return model_name in available_models
-            else:
-                self.logger.error(f"檢查模型時出錯: {result.stderr}")
-                assert False
-                
         except Exception as e:
-            self.logger.error(f"檢查模型 {model_name} 可用性時出錯: {e}")
-            assert False
+            self.logger.error(f"檢查模型可用性時出錯: {e}")
+            return None
+        
+        if result.returncode != 0:
+            self.logger.error(f"檢查模型時出錯: {result.stderr}")
+            return None
+        
+        # 第一行為欄位標題，其餘每行第一欄為模型名稱、第二欄為模型 ID（digest）
+        rows = [line.split() for line in result.stdout.splitlines()[1:] if line.strip()]
+        self._available_digests = {row[0]: row[1] for row in rows if len(row) > 1}
+        self._available_models = {row[0] for row in rows}
+        return self._available_models
+    
+    def invalidate_model_cache(self, model_name: Optional[str] = None) -> None:
+        """更新模型快取：指定名稱時標記為已安裝，否則清除快取以便下次重新查詢"""
+        with self._models_lock:
+            if model_name is None:
+                self._available_models = None
+                self._available_digests = {}
+            elif self._available_models is not None:
+                self._available_models.add(model_name)
+    
+    def check_model_availability(self, model_name: str) -> bool:
+        """檢查模型是否可用（整個測試過程只查詢一次 ollama list）"""
+        with self._models_lock:
+            models = self._available_models
+            if models is None:
+                models = self._refresh_available_models()
+            if models is None:
+                return False
+        
+        # 未指定標籤時對應 ollama 的預設標籤 latest
+        return model_name in models or (":" not in model_name and f"{model_name}:latest" in models)
+    
+    def get_model_digest(self, model_name: str) -> Optional[str]:
+        """返回已安裝模型的 ID（digest），可用於判斷不同名稱是否為同一模型；未安裝或尚未查詢時返回 None"""
+        with self._models_lock:
+            digests = self._available_digests
+        return digests.get(model_name) or (None if ":" in model_name else digests.get(f"{model_name}:latest"))
     
     def download_model_if_needed(self, model_name: str) -> bool:
         """如果需要，下載模型"""
         if self.check_model_availability(model_name):
             self.logger.info(f"模型 {model_name} 已存在")
-            assert True
+            return True
             
         self.logger.info(f"正在下載模型 {model_name}...")
         try:
@@ -201,23 +317,31 @@ class ModelConfigurationTester:
             
             if result.returncode == 0:
                 self.logger.info(f"模型 {model_name} 下載成功")
-                assert True
+                self.invalidate_model_cache(model_name)
+                return True
             else:
                 self.logger.error(f"模型 {model_name} 下載失敗: {result.stderr}")
-                assert False
+                return False
                 
         except subprocess.TimeoutExpired:
             self.logger.error(f"模型 {model_name} 下載超時")
-            assert False
+            return False
         except Exception as e:
             self.logger.error(f"下載模型 {model_name} 時出錯: {e}")
-            assert False
+            return False
     
     def run_baseline_test(self, config: ModelConfig, max_iterations: int = 10) -> Dict[str, Any]:
         """執行基準測試"""
-        self.logger.info(f"開始測試配置: {config.name}")
+        return asyncio.run(self.run_baseline_test_async(config, max_iterations))
+    
+    async def run_baseline_test_async(self, config: ModelConfig, max_iterations: int = 10,
+                                      ollama_host: Optional[str] = None) -> Dict[str, Any]:
+        """執行基準測試（於工作執行緒中調用優化器，可指定 Ollama 服務位址）"""
+        self.logger.info(f"開始測試配置: {config.name}" + (f" ({ollama_host})" if ollama_host else ""))
         self.logger.info(f"描述: {config.description}")
         
+        loop = asyncio.get_running_loop()
+        
         # 檢查並下載必要模型
         models_to_check = [config.generation_model, config.optimization_model]
         
@@ -225,7 +349,7 @@ class ModelConfigurationTester:
             if model_name == "current":  # 跳過當前embedding標記
                 continue
                 
-            if not self.download_model_if_needed(model_name):
+            if not await loop.run_in_executor(None, self.download_model_if_needed, model_name):
                 self.logger.error(f"無法獲取模型 {model_name}，跳過此配置測試")
                 return {
                     "config_name": config.name,
@@ -238,33 +362,38 @@ class ModelConfigurationTester:
         test_start_time = time.time()
         
         try:
-            # 構建測試命令
-            cmd = [
-                "python", "scripts/iterative_optimizer.py",
-                "--transcript-dir", "data/transcript",
-                "--model", config.generation_model,
-                "--optimization-model", config.optimization_model,
-                "--max-iterations", str(max_iterations),
-                "--quality-threshold", "0.8"
-            ]
-            
-            self.logger.info(f"執行測試命令: {' '.join(cmd)}")
-            
-            # 執行測試
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=3600  # 1小時超時
+            optimizer_config = OptimizationConfig(
+                max_iterations=max_iterations,
+                quality_threshold=0.8,
+                model_name=config.generation_model,
+                optimization_model=config.optimization_model,
+                ollama_host=ollama_host,
+                # 各配置使用獨立的結果目錄，並行測試時不會互相覆寫報告
+                output_dir=os.path.join("results", config.name)
             )
+            self.logger.info(f"執行優化測試: 生成模型 {config.generation_model}，優化模型 {config.optimization_model}，"
+                             f"最大疊代 {max_iterations} 輪")
             
+            # 執行測試（1小時截止，超過後不再開始新的一輪）
+            run_result = await loop.run_in_executor(None, functools.partial(
+                run_optimizer, optimizer_config, "data/transcript", deadline=time.monotonic() + 3600
+            ))
             test_duration = time.time() - test_start_time
             
-            if result.returncode == 0:
+            if run_result["timed_out"]:
+                self.logger.error(f"配置 {config.name} 測試超時")
+                return {
+                    "config_name": config.name,
+                    "status": "timeout",
+                    "test_duration": test_duration,
+                    "timestamp": datetime.now().isoformat()
+                }
+            
+            if run_result["transcripts"] or not run_result["errors"]:
                 self.logger.info(f"配置 {config.name} 測試完成，耗時 {test_duration:.2f} 秒")
                 
                 # 解析測試結果
-                test_results = self._parse_test_results(config.name, result.stdout)
+                test_results = self._parse_test_results(config.name, run_result)
                 test_results.update({
                     "config_name": config.name,
                     "status": "success",
@@ -275,23 +404,16 @@ class ModelConfigurationTester:
                 
                 return test_results
             else:
-                self.logger.error(f"配置 {config.name} 測試失敗: {result.stderr}")
+                error = "; ".join(run_result["errors"])
+                self.logger.error(f"配置 {config.name} 測試失敗: {error}")
                 return {
                     "config_name": config.name,
                     "status": "failed",
-                    "error": result.stderr,
+                    "error": error,
                     "test_duration": test_duration,
                     "timestamp": datetime.now().isoformat()
                 }
                 
-        except subprocess.TimeoutExpired:
-            self.logger.error(f"配置 {config.name} 測試超時")
-            return {
-                "config_name": config.name,
-                "status": "timeout",
-                "test_duration": time.time() - test_start_time,
-                "timestamp": datetime.now().isoformat()
-            }
         except Exception as e:
             self.logger.error(f"測試配置 {config.name} 時出錯: {e}")
             return {
@@ -302,20 +424,26 @@ class ModelConfigurationTester:
                 "timestamp": datetime.now().isoformat()
             }
     
-    def _parse_test_results(self, config_name: str, stdout: str) -> Dict[str, Any]:
-        """解析測試結果"""
-        # 這裡實現結果解析邏輯
-        # 暫時返回基本資訊
-        return {
-            "parsing_status": "basic",
-            "stdout_length": len(stdout),
-            "note": "詳細結果解析待實現"
-        }
+    def _parse_test_results(self, config_name: str, run_result: Dict[str, Any]) -> Dict[str, Any]:
+        """解析優化器返回的測試結果"""
+        return _summarize_optimizer_run(run_result)
     
-    def run_comprehensive_test(self, max_iterations: int = 10) -> Dict[str, Any]:
+    def run_comprehensive_test(self, max_iterations: int = 10,
+                               ollama_hosts: Optional[List[str]] = None) -> Dict[str, Any]:
         """執行全面配置測試"""
+        return asyncio.run(self.run_comprehensive_test_async(max_iterations, ollama_hosts))
+    
+    async def run_comprehensive_test_async(self, max_iterations: int = 10,
+                                           ollama_hosts: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        執行全面配置測試
+        
+        每個 Ollama 服務位址對應一個工作協程，從佇列取出配置執行；提供多個位址時
+        不同配置由不同 Ollama 實例同時處理。未指定時使用預設服務，配置依序執行。
+        """
+        hosts: List[Optional[str]] = list(ollama_hosts) if ollama_hosts else [None]
         self.logger.info("開始執行全面模型配置測試")
-        self.logger.info(f"測試 {len(self.test_configs)} 個配置")
+        self.logger.info(f"測試 {len(self.test_configs)} 個配置，使用 {len(hosts)} 個 Ollama 服務")
         
         all_results = {
             "test_start_time": datetime.now().isoformat(),
@@ -327,48 +455,61 @@ class ModelConfigurationTester:
             "summary": {}
         }
         
-        # 逐一測試每個配置
+        queue: "asyncio.Queue[ModelConfig]" = asyncio.Queue()
         for config in self.test_configs:
-            self.logger.info(f"\n{'='*60}")
-            self.logger.info(f"測試配置: {config.name}")
-            self.logger.info(f"{'='*60}")
-            
-            config_result = self.run_baseline_test(config, max_iterations)
-            all_results["config_results"][config.name] = config_result
-            
-            # 簡短休息，避免系統過載
-            time.sleep(10)
-        
-        # 生成測試總結
-        all_results["summary"] = self._generate_test_summary(all_results["config_results"])
-        all_results["test_end_time"] = datetime.now().isoformat()
+            queue.put_nowait(config)
+        config_results: Dict[str, Any] = {}
+        # 每個配置完成即累計狀態，長時間測試過程中可隨時看到進度
+        self._status_counter = Counter()
+        total = len(self.test_configs)
         
-        # 保存結果
+        # 每個配置完成即保存一次目前進度，中斷時已完成的配置結果不會遺失
         results_file = self.output_dir / f"comprehensive_test_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(results_file, 'w', encoding='utf-8') as f:
-            json.dump(all_results, f, indent=2, ensure_ascii=False)
+        
+        def save_progress():
+            all_results["config_results"] = {c.name: config_results[c.name] for c in self.test_configs
+                                             if c.name in config_results}
+            all_results["summary"] = self._generate_test_summary(all_results["config_results"], self._status_counter)
+            write_json(results_file, all_results)
+        
+        async def worker(ollama_host: Optional[str]):
+            while not queue.empty():
+                config = queue.get_nowait()
+                self.logger.info(f"\n{'='*60}")
+                self.logger.info(f"測試配置: {config.name}")
+                self.logger.info(f"{'='*60}")
+                config_result = await self.run_baseline_test_async(config, max_iterations, ollama_host)
+                config_results[config.name] = config_result
+                status = config_result.get("status", "unknown")
+                self._status_counter[status] += 1
+                self.logger.info(f"[{len(config_results)}/{total}] {config.name} status={status}")
+                save_progress()
+        
+        await asyncio.gather(*(worker(host) for host in hosts))
+        
+        # 依配置定義順序整理結果、生成測試總結並保存
+        all_results["test_end_time"] = datetime.now().isoformat()
+        save_progress()
         
         self.logger.info(f"測試完成，結果已保存至: {results_file}")
         return all_results
     
-    def _generate_test_summary(self, config_results: Dict[str, Any]) -> Dict[str, Any]:
-        """生成測試總結"""
+    def _generate_test_summary(self, config_results: Dict[str, Any],
+                               status_counts: Optional[Counter] = None) -> Dict[str, Any]:
+        """生成測試總結（status_counts 為測試過程中已累計的狀態次數，未提供時由結果重新統計）"""
+        if status_counts is None:
+            status_counts = Counter(result.get("status", "unknown") for result in config_results.values())
+        
         summary = {
             "total_configs": len(config_results),
             "successful_tests": 0,
             "failed_tests": 0,
             "timeout_tests": 0,
+            "unknown_tests": 0,
             "recommendations": []
         }
-        
-        for config_name, result in config_results.items():
-            status = result.get("status", "unknown")
-            if status == "success":
-                summary["successful_tests"] += 1
-            elif status == "failed" or status == "error":
-                summary["failed_tests"] += 1
-            elif status == "timeout":
-                summary["timeout_tests"] += 1
+        for status, count in status_counts.items():
+            summary[_STATUS_TO_FIELD.get(status, "unknown_tests")] += count
         
         # 生成建議
         if summary["successful_tests"] > 0:
@@ -399,41 +540,51 @@ class ModelConfigurationTester:
                 "embedding_model": config.embedding_model,
                 "description": config.description,
                 "expected_improvements": config.expected_improvements or {},
-                "model_rating": config.expected_improvements.get("model_rating", 0) if config.expected_improvements else 0,
-                "context_length": config.expected_improvements.get("context_length", 0) if config.expected_improvements else 0,
-                "technical_advantages": config.expected_improvements.get("technical_advantages", []) if config.expected_improvements else []
+                "model_rating": config.model_rating,
+                "context_length": config.context_length,
+                "technical_advantages": config.technical_advantages
             }
             comparison_data["model_specifications"][config.name] = specs
         
-        # 生成排名分析
-        rankings = sorted(
-            self.test_configs,
-            key=lambda x: x.expected_improvements.get("quality_improvement", 0) if x.expected_improvements else 0,
-            reverse=True
-        )
+        # 生成排名分析：先將數值欄位轉為平行陣列，一次向量化計算分數與排序，再按排名順序產生輸出
+        configs = self.test_configs
+        quality = np.fromiter((c.quality_improvement for c in configs), dtype=np.float64, count=len(configs))
+        sigma = np.fromiter((c.stability_sigma for c in configs), dtype=np.float64, count=len(configs))
+        rating = np.fromiter((c.model_rating for c in configs), dtype=np.int64, count=len(configs))
+        has_expected = np.fromiter((bool(c.expected_improvements) for c in configs), dtype=bool, count=len(configs))
+        stability = np.where(has_expected, 1.0 / (sigma + 0.01), 0.01)
+        
+        # 穩定排序，分數相同時保留原配置順序
+        quality_order = np.argsort(-quality, kind="stable")
+        stability_order = np.argsort(-stability, kind="stable")
+        rankings = [configs[i] for i in quality_order]
         
         comparison_data["ranking_analysis"] = {
             "by_quality_improvement": [
                 {
-                    "rank": i+1,
+                    "rank": rank,
                     "config_name": config.name,
-                    "expected_improvement": config.expected_improvements.get("quality_improvement", 0) if config.expected_improvements else 0,
-                    "rating": config.expected_improvements.get("model_rating", 0) if config.expected_improvements else 0
+                    "expected_improvement": config.quality_improvement,
+                    "rating": config.model_rating
                 }
-                for i, config in enumerate(rankings)
+                for rank, config in enumerate(rankings, 1)
             ],
-            "by_stability": sorted([
+            "by_stability": [
                 {
-                    "config_name": config.name,
-                    "expected_sigma": config.expected_improvements.get("stability_sigma", 1.0) if config.expected_improvements else 1.0,
-                    "stability_score": 1.0 / (config.expected_improvements.get("stability_sigma", 1.0) + 0.01) if config.expected_improvements else 0.01
+                    "config_name": configs[i].name,
+                    "expected_sigma": configs[i].stability_sigma,
+                    "stability_score": float(stability[i])
                 }
-                for config in self.test_configs
-            ], key=lambda x: x["stability_score"], reverse=True)
+                for i in stability_order
+            ]
         }
         
         # 生成建議
         best_config = rankings[0] if rankings else None
+        
+        def names_where(mask: np.ndarray) -> List[str]:
+            return [configs[i].name for i in np.flatnonzero(mask & has_expected)]
+        
         comparison_data["recommendations"] = {
             "top_recommendation": best_config.name if best_config else "無法確定",
             "reasoning": f"基於模型規格分析，{best_config.name}具有最高的品質改善潛力" if best_config else "需要更多數據",
@@ -443,23 +594,22 @@ class ModelConfigurationTester:
                 f"備用方案: {rankings[2].name}" if len(rankings) > 2 else ""
             ],
             "risk_assessment": {
-                "high_performance": [config.name for config in self.test_configs if config.expected_improvements and config.expected_improvements.get("model_rating", 0) >= 5],
-                "moderate_risk": [config.name for config in self.test_configs if config.expected_improvements and config.expected_improvements.get("model_rating", 0) == 4],
-                "conservative_choice": [config.name for config in self.test_configs if config.expected_improvements and config.expected_improvements.get("model_rating", 0) <= 3]
+                "high_performance": names_where(rating >= 5),
+                "moderate_risk": names_where(rating == 4),
+                "conservative_choice": names_where(rating <= 3)
             }
         }
         
         # 保存比較報告
         report_file = self.output_dir / f"model_specs_comparison_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        with open(report_file, 'w', encoding='utf-8') as f:
-            json.dump(comparison_data, f, indent=2, ensure_ascii=False)
+        write_json(report_file, comparison_data)
         
         self.logger.info(f"模型規格比較報告已生成: {report_file}")
         return comparison_data
 
     def run_quick_validation_test(self, config_name: str) -> Dict[str, Any]:
         """執行快速驗證測試（僅檢查模型可用性和基本功能）"""
-        config = next((c for c in self.test_configs if c.name == config_name), None)
+        config = self.get_config(config_name)
         if not config:
             return {"error": f"找不到配置: {config_name}"}
         
@@ -503,6 +653,8 @@ def main():
     parser.add_argument("--config", type=str, help="指定測試的配置名稱")
     parser.add_argument("--max-iterations", type=int, default=5, help="最大疊代次數（用於quick/full模式）")
     parser.add_argument("--output-dir", type=str, default="model_config_tests", help="輸出目錄")
+    parser.add_argument("--ollama-hosts", type=str, default="",
+                       help="以逗號分隔的 Ollama 服務位址（用於full模式），多個位址時並行測試不同配置")
     
     args = parser.parse_args()
     
@@ -534,9 +686,12 @@ def main():
             
             configs_to_test = [args.config] if args.config else [c.name for c in tester.test_configs]
             
-            for config_name in configs_to_test:
+            # 各配置的驗證互不相依，以執行緒池同時進行，再依配置順序輸出
+            with ThreadPoolExecutor(max_workers=min(8, len(configs_to_test))) as executor:
+                results = list(executor.map(tester.run_quick_validation_test, configs_to_test))
+            
+            for config_name, result in zip(configs_to_test, results):
                 print(f"\n📋 驗證配置: {config_name}")
-                result = tester.run_quick_validation_test(config_name)
                 validation_results[config_name] = result
                 
                 status = result.get("validation_status", "unknown")
@@ -550,8 +705,7 @@ def main():
             
             # 保存驗證結果
             validation_file = Path(args.output_dir) / f"validation_results_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-            with open(validation_file, 'w', encoding='utf-8') as f:
-                json.dump(validation_results, f, indent=2, ensure_ascii=False)
+            write_json(validation_file, validation_results)
             print(f"\n📊 驗證結果已保存: {validation_file}")
         
         elif args.mode == "quick":
@@ -559,7 +713,7 @@ def main():
             print(f"⚡ 執行快速基準測試（{args.max_iterations}次疊代）...")
             
             if args.config:
-                config = next((c for c in tester.test_configs if c.name == args.config), None)
+                config = tester.get_config(args.config)
                 if config:
                     result = tester.run_baseline_test(config, max_iterations=args.max_iterations)
                     print(f"✅ 配置 {args.config} 測試完成")
@@ -575,7 +729,8 @@ def main():
         elif args.mode == "full":
             # 完整測試
             print(f"🚀 執行完整模型配置測試（{args.max_iterations}次疊代）...")
-            results = tester.run_comprehensive_test(max_iterations=args.max_iterations)
+            ollama_hosts = [h.strip() for h in args.ollama_hosts.split(",") if h.strip()]
+            results = tester.run_comprehensive_test(max_iterations=args.max_iterations, ollama_hosts=ollama_hosts)
             
             print("\n📊 測試總結:")
             summary = results.get("summary", {})
@@ -596,6 +751,8 @@ def main():
     except Exception as e:
         print(f"❌ 測試過程中出錯: {e}")
         tester.logger.error(f"測試失敗: {e}")
+    finally:
+        tester.close()
     
     print("\n🏁 測試程式結束")
 
@@ -5,7 +5,6 @@
 """
 
 from .config import EvaluationConfig, MetricConfig, MetricCategory
-from .evaluator import MeetingEvaluator
 
 __all__ = [
     'EvaluationConfig',
@@ -13,3 +12,12 @@ __all__ = [
     'MetricCategory',
     'MeetingEvaluator'
 ]
+
+
+def __getattr__(name):
+    # MeetingEvaluator 依賴 sklearn 等較重的套件，延遲到首次存取時才導入，
+    # 使僅需 config 或 taiwan_meeting_evaluator 的呼叫端不必承擔這些導入成本
+    if name == 'MeetingEvaluator':
+        from .evaluator import MeetingEvaluator
+        return MeetingEvaluator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
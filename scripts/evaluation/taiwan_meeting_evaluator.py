@@ -7,19 +7,115 @@
 3. 行動項目具體性
 """
 import re
+import hashlib
+import functools
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Tuple, Optional, Any, Union
 import json
 from pathlib import Path
 
+# 台灣用語關鍵詞（按重要性分組）
+_TAIWAN_TERMS = [
+    # 高權重（政府單位和職稱）
+    '市政府', '區公所', '里辦公處', '局處', '科', '課', '股',
+    '市長', '局長', '處長', '科長', '課長', '股長', '承辦人',
+    '議員', '里長', '主任', '委員', '顧問',
+
+    # 中權重（程序用語）
+    '會議紀錄', '決議', '裁示', '指示', '報告', '討論', '決議事項',
+    '提案', '說明', '散會', '主席', '紀錄',
+
+    # 低權重（公文用語）
+    '奉交下', '敬陳', '鑒核', '核示', '核備', '備查', '照辦',
+
+    # 日期格式
+    r'\d+年\d+月\d+日', r'\d+/\d+/\d+',
+
+    # 文號格式
+    r'[\u4e00-\u9fa5]+\d+[\u4e00-\u9fa5]*\d*號',
+
+    # 其他常見用語
+    '請查照', '請鑒核', '請核示', '請核備', '請備查',
+    '報請', '陳報', '陳核', '陳閱', '陳核示'
+]
+
+# 大陸用語（扣分項）
+_MAINLAND_TERMS = [
+    '领导', '部门', '会议记录', '办理', '审批', '汇报',
+    '汇报工作', '汇报情况', '汇报如下', '汇报内容', '汇报材料',
+    '领导批示', '领导指示', '领导要求', '领导强调', '领导指出',
+    '贯彻落实', '切实做好', '认真做好', '抓紧抓好', '切实加强'
+]
+
+# 行動項目模式（按重要性排序）
+_ACTION_PATTERNS = [
+    # 高權重（明確的負責人和期限）
+    r'負責[人單位][:：]\s*[^\n]+',
+    r'[負主]?責[人單位][:：]\s*[^\n]+',
+    r'期限[:：]\s*[^\n]+',
+    r'完成[時間日期][:：]\s*[^\n]+',
+
+    # 中權重（明確的動作和對象）
+    r'請[\w\u4e00-\u9fa5]+(?:局|處|室|科|所|課|股|隊)[^\n]*辦理',
+    r'[應須]\s*[^\n]*(?:辦理|處理|研議|評估|檢討|提供|回覆)',
+
+    # 低權重（表格格式）
+    r'\|\s*[^|]+\|\s*[^|]+\|\s*[^|]+\|',  # 簡單的表格格式
+    r'\d+\.\s*[^\n]+',  # 編號列表
+
+    # 其他常見模式
+    r'追蹤[事項項目][:：]',
+    r'後續[處理作業][:：]',
+    r'待辦[事項項目][:：]'
+]
+
+# 預先編譯的評分表：模組載入時建立一次，各次評估直接使用
+# 台灣用語：前20個詞（政府單位和職稱）權重較高
+_TAIWAN_TERM_TABLE = tuple(
+    (re.compile(term), 1.5 if i < 20 else (1.2 if i < 40 else 1.0))
+    for i, term in enumerate(_TAIWAN_TERMS)
+)
+# 行動項目：每個模式的最大分數
+_ACTION_MAX_SCORES = [1.0] * 4 + [0.8] * 2 + [0.5] * 4 + [0.3] * 3
+_ACTION_PATTERN_TABLE = tuple(
+    (re.compile(pattern), _ACTION_MAX_SCORES[i] if i < len(_ACTION_MAX_SCORES) else 0.5)
+    for i, pattern in enumerate(_ACTION_PATTERNS)
+)
+_HEADING_RE = re.compile(r'#{1,3}\s+[^\n]+')
+_ACTION_SECTION_RE = re.compile(r'##?\s*(?:行動項目|決議事項|後續處理|待辦事項)[^#]*', re.DOTALL | re.IGNORECASE)
+
+
+def _cached_feature(method):
+    """以文本雜湊快取子分數（子分數僅取決於文本內容），相同段落重複評估時直接返回"""
+    @functools.wraps(method)
+    def wrapper(self, text):
+        if self._cache_size <= 0 or not isinstance(text, str):
+            return method(self, text)
+        key = (method.__name__, self._text_digest(text))
+        with self._cache_lock:
+            if key in self._feature_cache:
+                self._feature_cache.move_to_end(key)
+                return self._feature_cache[key]
+        value = method(self, text)
+        with self._cache_lock:
+            self._feature_cache[key] = value
+            while len(self._feature_cache) > self._cache_size:
+                self._feature_cache.popitem(last=False)
+        return value
+    return wrapper
+
+
 class TaiwanMeetingEvaluator:
     """台灣會議記錄專用評估器"""
     
-    def __init__(self, config_path: Optional[str] = None):
+    def __init__(self, config_path: Optional[str] = None, cache_size: int = 512):
         """
         初始化評估器
         
         Args:
             config_path: 配置檔案路徑，如為None則使用預設配置
+            cache_size: 評分結果快取的最大筆數（以文本雜湊為鍵），0 表示停用
         """
         self.required_elements = {
             '會議基本資訊': ['時間', '地點', '主持人', '與會人員'],
@@ -30,6 +126,18 @@ class TaiwanMeetingEvaluator:
         # 載入自定義配置（如果提供）
         if config_path and Path(config_path).exists():
             self._load_config(config_path)
+        
+        # 評分結果快取：相同文本重複評估時直接返回（LRU 淘汰）
+        self._cache_size = cache_size
+        self._score_cache: "OrderedDict[Tuple[str, str], Dict[str, Union[float, str]]]" = OrderedDict()
+        # 子分數快取：參考文本在每次比較時都會重新評估，以此避免重複計算
+        self._feature_cache: "OrderedDict[Tuple[str, str], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    @staticmethod
+    def _text_digest(text: str) -> str:
+        """計算文本的內容雜湊，作為快取鍵"""
+        return hashlib.blake2b((text or "").encode("utf-8"), digest_size=16).hexdigest()
     
     def _load_config(self, config_path: str) -> None:
         """載入自定義配置"""
@@ -51,6 +159,26 @@ class TaiwanMeetingEvaluator:
         Returns:
             包含各項評分的字典
         """
+        if self._cache_size <= 0:
+            return self._compute_scores(reference, candidate)
+        
+        key = (self._text_digest(reference), self._text_digest(candidate))
+        with self._cache_lock:
+            cached = self._score_cache.get(key)
+            if cached is not None:
+                self._score_cache.move_to_end(key)
+                return dict(cached)
+        
+        scores = self._compute_scores(reference, candidate)
+        if 'error' not in scores:
+            with self._cache_lock:
+                self._score_cache[key] = dict(scores)
+                while len(self._score_cache) > self._cache_size:
+                    self._score_cache.popitem(last=False)
+        return scores
+    
+    def _compute_scores(self, reference: str, candidate: str) -> Dict[str, Union[float, str]]:
+        """計算會議記錄各項評分（不經快取）"""
         try:
             scores: Dict[str, Union[float, str]] = {}
             
@@ -109,6 +237,7 @@ class TaiwanMeetingEvaluator:
                 'error': str(e)
             }
     
+    @_cached_feature
     def _evaluate_structure(self, text: str) -> float:
         """
         評估會議記錄結構完整性
@@ -128,9 +257,8 @@ class TaiwanMeetingEvaluator:
             section_score = (len(present_sections) / len(required_sections)) * 0.7
             
             # 檢查層次結構 (0.2 權重)
-            heading_pattern = r'#{1,3}\s+[^\n]+'
-            headings = re.findall(heading_pattern, text)
-            has_hierarchy = len(headings) >= 3
+            # 只需確認至少3個標題，找到第3個即停止掃描
+            has_hierarchy = sum(1 for _ in zip(range(3), _HEADING_RE.finditer(text))) >= 3
             hierarchy_score = 0.2 if has_hierarchy else 0.0
             
             # 檢查段落結構 (0.1 權重)
@@ -148,6 +276,7 @@ class TaiwanMeetingEvaluator:
             print(f"評估結構時出錯: {str(e)}")
             return 0.0
     
+    @_cached_feature
     def _evaluate_taiwan_context(self, text: str) -> float:
         """
         評估台灣政府用語使用情況
@@ -159,53 +288,15 @@ class TaiwanMeetingEvaluator:
             if not text or not isinstance(text, str):
                 return 0.0
                 
-            # 台灣用語關鍵詞（按重要性分組）
-            taiwan_terms = [
-                # 高權重（政府單位和職稱）
-                '市政府', '區公所', '里辦公處', '局處', '科', '課', '股',
-                '市長', '局長', '處長', '科長', '課長', '股長', '承辦人',
-                '議員', '里長', '主任', '委員', '顧問',
-                
-                # 中權重（程序用語）
-                '會議紀錄', '決議', '裁示', '指示', '報告', '討論', '決議事項',
-                '提案', '說明', '散會', '主席', '紀錄',
-                
-                # 低權重（公文用語）
-                '奉交下', '敬陳', '鑒核', '核示', '核備', '備查', '照辦',
-                
-                # 日期格式
-                r'\d+年\d+月\d+日', r'\d+/\d+/\d+',
-                
-                # 文號格式
-                r'[\u4e00-\u9fa5]+\d+[\u4e00-\u9fa5]*\d*號',
-                
-                # 其他常見用語
-                '請查照', '請鑒核', '請核示', '請核備', '請備查',
-                '報請', '陳報', '陳核', '陳閱', '陳核示'
-            ]
-            
-            # 大陸用語（扣分項）
-            mainland_terms = [
-                '领导', '部门', '会议记录', '办理', '审批', '汇报',
-                '汇报工作', '汇报情况', '汇报如下', '汇报内容', '汇报材料',
-                '领导批示', '领导指示', '领导要求', '领导强调', '领导指出',
-                '贯彻落实', '切实做好', '认真做好', '抓紧抓好', '切实加强'
-            ]
-            
             # 計算台灣用語匹配數（加權計算）
-            scores = []
-            for i, term in enumerate(taiwan_terms):
-                # 前20個詞（政府單位和職稱）權重較高
-                weight = 1.5 if i < 20 else (1.2 if i < 40 else 1.0)
-                if re.search(term, text):
-                    scores.append(weight)
+            scores = [weight for pattern, weight in _TAIWAN_TERM_TABLE if pattern.search(text)]
             
             # 計算加權分數
-            taiwan_score = sum(scores) / (len(taiwan_terms) * 1.5)  # 標準化到0-1
+            taiwan_score = sum(scores) / (len(_TAIWAN_TERMS) * 1.5)  # 標準化到0-1
             
             # 計算大陸用語扣分
             mainland_penalty: float = 0.0
-            for term in mainland_terms:
+            for term in _MAINLAND_TERMS:
                 if term in text:
                     mainland_penalty += 0.05  # 每個大陸用語扣0.05分
             
@@ -213,7 +304,7 @@ class TaiwanMeetingEvaluator:
             final_score = max(0, min(1.0, taiwan_score - min(0.3, mainland_penalty)))
             
             # 確保分數不會為0（除非完全沒有匹配）
-            if final_score == 0 and any(term in text for term in taiwan_terms[:10]):
+            if final_score == 0 and any(term in text for term in _TAIWAN_TERMS[:10]):
                 return 0.1  # 最低給0.1分，如果至少有匹配到一些基本用語
                 
             return final_score
@@ -222,6 +313,7 @@ class TaiwanMeetingEvaluator:
             print(f"評估台灣語境時出錯: {str(e)}")
             return 0.0
     
+    @_cached_feature
     def _evaluate_action_items(self, text: str) -> float:
         """
         評估行動項目的具體性
@@ -233,30 +325,8 @@ class TaiwanMeetingEvaluator:
             if not text or not isinstance(text, str):
                 return 0.0
                 
-            # 行動項目模式（按重要性排序）
-            action_patterns = [
-                # 高權重（明確的負責人和期限）
-                r'負責[人單位][:：]\s*[^\n]+',
-                r'[負主]?責[人單位][:：]\s*[^\n]+',
-                r'期限[:：]\s*[^\n]+',
-                r'完成[時間日期][:：]\s*[^\n]+',
-                
-                # 中權重（明確的動作和對象）
-                r'請[\w\u4e00-\u9fa5]+(?:局|處|室|科|所|課|股|隊)[^\n]*辦理',
-                r'[應須]\s*[^\n]*(?:辦理|處理|研議|評估|檢討|提供|回覆)',
-                
-                # 低權重（表格格式）
-                r'\|\s*[^|]+\|\s*[^|]+\|\s*[^|]+\|',  # 簡單的表格格式
-                r'\d+\.\s*[^\n]+',  # 編號列表
-                
-                # 其他常見模式
-                r'追蹤[事項項目][:：]',
-                r'後續[處理作業][:：]',
-                r'待辦[事項項目][:：]'
-            ]
-            
             # 檢查行動項目部分
-            action_section = re.search(r'##?\s*(?:行動項目|決議事項|後續處理|待辦事項)[^#]*', text, re.DOTALL | re.IGNORECASE)
+            action_section = _ACTION_SECTION_RE.search(text)
             if not action_section:
                 # 如果沒有明確的行動項目標題，檢查整個文本中是否有行動項目
                 action_text = text
@@ -267,11 +337,8 @@ class TaiwanMeetingEvaluator:
             
             # 計算匹配的模式數（加權）
             total_score = 0.0
-            max_scores = [1.0] * 4 + [0.8] * 2 + [0.5] * 4 + [0.3] * 3  # 每個模式的最大分數
-            
-            for i, pattern in enumerate(action_patterns):
-                weight = max_scores[i] if i < len(max_scores) else 0.5
-                if re.search(pattern, action_text):
+            for pattern, weight in _ACTION_PATTERN_TABLE:
+                if pattern.search(action_text):
                     total_score += weight
             
             # 如果有明確的行動項目部分，給予基礎分
@@ -284,7 +351,7 @@ class TaiwanMeetingEvaluator:
             final_score = min(1.0, base_score + (total_score * 0.7))
             
             # 確保分數不會為0（除非完全沒有匹配）
-            if final_score == 0 and any(re.search(p, text) for p in action_patterns[:5]):
+            if final_score == 0 and any(pattern.search(text) for pattern, _ in _ACTION_PATTERN_TABLE[:5]):
                 return 0.1  # 最低給0.1分，如果至少有匹配到一些基本模式
                 
             return final_score
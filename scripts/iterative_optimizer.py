@@ -8,12 +8,17 @@
 import os
 import json
 import time
+import asyncio
+import hashlib
 import logging
 import argparse
 import subprocess
+import tempfile
+import threading
+from contextlib import contextmanager
 from glob import glob
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, AsyncIterator, Iterator, Optional, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
@@ -65,6 +70,10 @@ class OptimizationConfig:
     enable_semantic_segmentation: bool = False
     semantic_model: str = "gemma3:12b"
     max_segment_length: int = 4000
+    candidates_per_round: int = 3  # optimize_async 每輪並行生成的候選策略組合數
+    keep_alive: str = "30m"  # 模型在 Ollama 中保持載入的時間，避免各輪及各次優化之間重新載入
+    ollama_host: Optional[str] = None  # 指定 Ollama 服務位址（OLLAMA_HOST），None 時沿用目前環境
+    output_dir: str = "results"  # 疊代與最終結果的輸出根目錄，並行比較多組模型時各自指定以免互相覆寫
 
 class MeetingOptimizer:
     """會議記錄優化器 - 實現完整的疊代優化流程"""
@@ -73,8 +82,17 @@ class MeetingOptimizer:
         self.config = config
         self.strategies = self._load_strategies()
         self.logger = self._setup_logger()
+        self._build_strategy_index()
         self.results_history: List[OptimizationResult] = []
         
+        # 跨次執行的搜尋記憶：依逐字稿雜湊與模型記錄各策略組合的成敗，避免重複嘗試已知失敗的組合
+        memory_dir = os.environ.get("OPT_MEMORY_DIR") or os.path.join(Path.home(), ".cache", "exam08")
+        self._memory_path = Path(memory_dir) / "opt_memory.jsonl"
+        self._memory: List[Dict[str, Any]] = self._load_memory()
+        self._memory_lock = threading.Lock()
+        self._text_hash: Optional[str] = None
+        self._subprocess_env: Optional[Dict[str, str]] = None
+        
         # 初始化評估器
         if EVALUATOR_AVAILABLE:
             eval_config = EvaluationConfig()
@@ -134,6 +152,118 @@ class MeetingOptimizer:
             self.logger.error(f"載入策略失敗: {e}")
             return {}
     
+    def _load_memory(self) -> List[Dict[str, Any]]:
+        """載入搜尋記憶（每行一筆 JSON 記錄），無法解析的行略過"""
+        records = []
+        try:
+            with open(self._memory_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            self.logger.warning(f"載入搜尋記憶失敗: {e}")
+        return records
+    
+    def _remember(self, iteration: int, strategies: List[str], scores: Dict[str, float],
+                  history: List[OptimizationResult]):
+        """
+        記錄一次策略組合嘗試的結果；分數明顯下降視為失敗
+        
+        記錄以逐字稿雜湊與生成、優化模型為鍵，不同模型的結果互不影響。
+        生成失敗（如 ollama 逾時）多為暫時性問題，與策略組合無關，呼叫端不予記錄。
+        """
+        if not self._text_hash:
+            return
+        score = scores.get('overall_score', 0)
+        score_delta = score - history[-1].scores.get('overall_score', 0) if history else 0.0
+        record: Dict[str, Any] = {
+            "text_hash": self._text_hash,
+            "model_name": self.config.model_name,
+            "optimization_model": self.config.optimization_model,
+            "iteration": iteration,
+            "strategies": strategies,
+            "timestamp": datetime.now().isoformat(),
+            "score": score,
+            "score_delta": score_delta
+        }
+        if score_delta < -self.config.min_improvement:
+            record["error"] = "分數下降"
+        
+        # 單次寫入整行並以附加模式開啟，並行寫入時各記錄不會交錯
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._memory_lock:
+            self._memory.append(record)
+            try:
+                self._memory_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self._memory_path, "a", encoding="utf-8") as f:
+                    f.write(line)
+            except OSError as e:
+                self.logger.warning(f"寫入搜尋記憶失敗: {e}")
+    
+    def _memory_records(self) -> List[Dict[str, Any]]:
+        """目前逐字稿在目前生成與優化模型下的搜尋記憶"""
+        if not self._text_hash:
+            return []
+        return [r for r in self._memory
+                if r.get("text_hash") == self._text_hash
+                and r.get("model_name") == self.config.model_name
+                and r.get("optimization_model") == self.config.optimization_model]
+    
+    def _known_failures(self) -> set:
+        """目前逐字稿已知失敗的策略組合"""
+        return {tuple(r.get("strategies", [])) for r in self._memory_records() if r.get("error")}
+    
+    def _format_memory(self) -> str:
+        """將搜尋記憶整理為提示詞段落，無記錄時返回空字串"""
+        records = self._memory_records()
+        if not records:
+            return ""
+        failures = [r for r in records if r.get("error")][-10:]
+        successes = [r for r in records if not r.get("error") and r.get("score_delta", 0) >= self.config.min_improvement][-10:]
+        if not failures and not successes:
+            return ""
+        
+        lines = ["## 歷史搜尋記憶"]
+        if failures:
+            lines.append("### 已知失敗的策略組合（請避免）")
+            lines.extend(f"- {', '.join(r['strategies'])}：{r['error']}" for r in failures)
+        if successes:
+            lines.append("### 有效的策略組合")
+            lines.extend(f"- {', '.join(r['strategies'])}：分數 {r['score']:.4f} ({r['score_delta']:+.4f})" for r in successes)
+        return "\n".join(lines) + "\n"
+    
+    def _avoid_known_failures(self, strategies: List[str], iteration: int) -> List[str]:
+        """若策略組合已知失敗，改用同維度替換後的第一個未失敗組合"""
+        failures = self._known_failures()
+        if tuple(strategies) not in failures:
+            return strategies
+        for candidate in self._candidate_combinations(strategies, iteration, len(self.strategies) + 1)[1:]:
+            if tuple(candidate) not in failures:
+                self.logger.info(f"略過已知失敗的策略組合，改用: {', '.join(candidate)}")
+                return candidate
+        return strategies
+    
+    def _ollama_command(self, model: str) -> List[str]:
+        """組成 ollama run 指令，帶入 keep_alive 讓模型在調用之間保持載入"""
+        command = ["ollama", "run", model]
+        if self.config.keep_alive:
+            command += ["--keepalive", self.config.keep_alive]
+        return command
+    
+    def _ollama_env(self) -> Optional[Dict[str, str]]:
+        """指定 Ollama 服務位址時，返回帶有 OLLAMA_HOST 的子程序環境變數（首次建立後重複使用）"""
+        if not self.config.ollama_host:
+            return None
+        if self._subprocess_env is None:
+            env = os.environ.copy()
+            env["OLLAMA_HOST"] = self.config.ollama_host
+            self._subprocess_env = env
+        return self._subprocess_env
+    
     def _find_reference(self, transcript_name: str) -> Optional[str]:
         """尋找對應的參考會議記錄"""
         reference_dir = "data/reference"
@@ -207,33 +337,28 @@ class MeetingOptimizer:
         available_strategies = list(self.strategies.keys())
         return available_strategies[:min(self.config.strategy_max_count, len(available_strategies))]
     
+    def _build_strategy_index(self):
+        """依維度與衝突規則建立策略索引（策略表載入後不再變動，只需建立一次）"""
+        self._dimension_index: Dict[str, List[str]] = {}
+        self._conflict_sets: Dict[str, frozenset] = {}
+        for strategy_id, strategy_data in self.strategies.items():
+            # 策略數據中沒有維度字段時，根據ID前綴判斷
+            dimension = strategy_data.get('dimension', '') or self._get_strategy_dimension(strategy_id)
+            if dimension:
+                self._dimension_index.setdefault(dimension, []).append(strategy_id)
+            self._conflict_sets[strategy_id] = frozenset(strategy_data.get('conflict_with', []))
+    
     def _get_strategy_pools_by_dimension(self) -> Dict[str, List[str]]:
         """根據維度分組策略"""
-        pools = {
-            'role': [],
-            'structure': [],
-            'content': [],
-            'format': [],
-            'language': [],
-            'quality': []
+        pool_dimensions = {
+            'role': '角色',
+            'structure': '結構',
+            'content': '內容',
+            'format': '格式',
+            'language': '語言',
+            'quality': '品質'
         }
-        
-        for strategy_id, strategy_data in self.strategies.items():
-            dimension = strategy_data.get('dimension', '')
-            if dimension == '角色':
-                pools['role'].append(strategy_id)
-            elif dimension == '結構':
-                pools['structure'].append(strategy_id)
-            elif dimension == '內容':
-                pools['content'].append(strategy_id)
-            elif dimension == '格式':
-                pools['format'].append(strategy_id)
-            elif dimension == '語言':
-                pools['language'].append(strategy_id)
-            elif dimension == '品質':
-                pools['quality'].append(strategy_id)
-        
-        return pools
+        return {pool: list(self._dimension_index.get(dimension, [])) for pool, dimension in pool_dimensions.items()}
     
     def _select_compatible_strategies(self, strategy_pools: Dict[str, List[str]], iteration: int) -> List[str]:
         """選擇兼容的策略組合"""
@@ -261,14 +386,8 @@ class MeetingOptimizer:
     
     def _has_conflict(self, strategy_id: str, selected_strategies: List[str]) -> bool:
         """檢查策略是否與已選策略衝突"""
-        strategy_data = self.strategies.get(strategy_id, {})
-        conflicts = strategy_data.get('conflict_with', [])
-        
-        for selected_strategy in selected_strategies:
-            if selected_strategy in conflicts:
-                return True
-                
-        return False
+        conflicts = self._conflict_sets.get(strategy_id)
+        return bool(conflicts) and any(selected_strategy in conflicts for selected_strategy in selected_strategies)
     
     def _try_replace_weaker_strategy(self, new_strategy: str, current_strategies: List[str], history: List[OptimizationResult]) -> Optional[str]:
         """嘗試替換同維度的較弱策略"""
@@ -374,20 +493,7 @@ class MeetingOptimizer:
         """根據維度獲取該維度的所有策略"""
         if not dimension:
             return []
-        
-        dimension_strategies = []
-        for strategy_id, strategy_data in self.strategies.items():
-            # 檢查策略數據中的維度字段
-            strategy_dimension = strategy_data.get('dimension', '')
-            
-            # 如果策略數據中沒有維度字段，根據ID前綴判斷
-            if not strategy_dimension:
-                strategy_dimension = self._get_strategy_dimension(strategy_id)
-            
-            if strategy_dimension == dimension:
-                dimension_strategies.append(strategy_id)
-        
-        return dimension_strategies
+        return list(self._dimension_index.get(dimension, []))
     
     def _generate_improvement_prompt(self, meeting_record: str, history: Dict, reference: Optional[str] = None) -> str:
         """生成結構化策略改進提示詞"""
@@ -436,6 +542,7 @@ class MeetingOptimizer:
 ## 可用策略資源
 {self._format_available_strategies(available_strategies)}
 
+{self._format_memory()}
 ## 任務要求
 請基於上述分析，以JSON格式輸出結構化的策略改進建議：
 
@@ -486,11 +593,12 @@ class MeetingOptimizer:
         
         try:
             result = subprocess.run(
-                ["ollama", "run", self.config.optimization_model],
+                self._ollama_command(self.config.optimization_model),
                 input=prompt,
                 capture_output=True,
                 text=True,
-                timeout=300
+                timeout=300,
+                env=self._ollama_env()
             )
             
             if result.returncode == 0:
@@ -728,11 +836,12 @@ class MeetingOptimizer:
         try:
             start_time = time.time()
             result = subprocess.run(
-                ["ollama", "run", self.config.model_name],
+                self._ollama_command(self.config.model_name),
                 input=prompt,
                 capture_output=True,
                 text=True,
-                timeout=600
+                timeout=600,
+                env=self._ollama_env()
             )
             execution_time = time.time() - start_time
             
@@ -817,15 +926,18 @@ class MeetingOptimizer:
     
     def _should_stop_early(self, history: List[OptimizationResult]) -> Tuple[bool, str]:
         """判斷是否應該提前停止"""
-        if not self.config.enable_early_stopping or len(history) < 2:
+        if not self.config.enable_early_stopping or not history:
             return False, ""
         
         latest = history[-1]
         
-        # 檢查是否達到品質閾值
+        # 檢查是否達到品質閾值（首輪即達標時不再進行後續輪次）
         if latest.scores.get('overall_score', 0) >= self.config.quality_threshold:
             return True, f"達到品質閾值 {self.config.quality_threshold}"
         
+        if len(history) < 2:
+            return False, ""
+        
         # 檢查是否連續無改善 (使用 patience 和 min_improvement)
         patience = self.config.patience
         # 需要至少 patience+1 次歷史記錄以比較差異
@@ -843,7 +955,7 @@ class MeetingOptimizer:
             return
         
         # 創建結果目錄
-        results_dir = f"results/iterations/{transcript_name}"
+        results_dir = os.path.join(self.config.output_dir, "iterations", transcript_name)
         os.makedirs(results_dir, exist_ok=True)
         
         # 保存會議記錄
@@ -861,7 +973,7 @@ class MeetingOptimizer:
     def _save_final_results(self, best_result: OptimizationResult, transcript_name: str, history: List[OptimizationResult]):
         """保存最終結果"""
         # 創建最終結果目錄
-        final_dir = "results/optimized"
+        final_dir = os.path.join(self.config.output_dir, "optimized")
         os.makedirs(final_dir, exist_ok=True)
         
         # 保存最佳會議記錄
@@ -896,8 +1008,8 @@ class MeetingOptimizer:
         self.logger.info(f"最佳分數: {best_result.scores.get('overall_score', 0):.4f}")
         self.logger.info(f"最佳策略組合: {', '.join(best_result.strategy_combination)}")
     
-    def optimize_transcript(self, transcript_path: str) -> OptimizationResult:
-        """優化單個逐字稿 - 完整的疊代流程"""
+    def _load_transcript(self, transcript_path: str) -> Tuple[str, str, Optional[str]]:
+        """載入逐字稿並尋找參考會議記錄，返回 (名稱, 逐字稿, 參考記錄)"""
         transcript_name = Path(transcript_path).stem
         self.logger.info(f"開始優化逐字稿: {transcript_name}")
         
@@ -915,6 +1027,54 @@ class MeetingOptimizer:
         else:
             self.logger.info("未找到對應的參考會議記錄，將使用無參考評估")
         
+        self._text_hash = hashlib.sha256(transcript.encode("utf-8")).hexdigest()[:16]
+        return transcript_name, transcript, reference
+    
+    def _collect_improvements(self, iteration: int, history: List[OptimizationResult],
+                              transcript: str, reference: Optional[str]) -> Optional[Dict]:
+        """獲取策略改進建議（從第二輪開始）"""
+        if iteration == 0 or not history:
+            return None
+        try:
+            # 構建歷史数據用於改進建議
+            history_dict = {"iterations": [asdict(result) for result in history]}
+            improvements = self._get_strategy_improvements(transcript, history_dict, reference)
+            
+            if improvements and "structured_suggestions" in improvements:
+                self.logger.info("獲得結構化改進建議")
+            return improvements
+        except Exception as e:
+            self.logger.warning(f"獲取改進建議失敗: {e}")
+            return None
+    
+    def _candidate_combinations(self, base: List[str], iteration: int, count: int) -> List[List[str]]:
+        """以基礎組合為首，逐一替換單一策略為同維度的其他策略，產生至多 count 組不重複的候選組合"""
+        candidates = [list(base)]
+        seen = {tuple(base)}
+        for offset in range(len(base)):
+            idx = (iteration + offset) % len(base)
+            alternatives = self._get_dimension_strategies(self._get_strategy_dimension(base[idx]))
+            for k in range(len(alternatives)):
+                if len(candidates) >= count:
+                    return candidates
+                alternative = alternatives[(iteration + k) % len(alternatives)]
+                others = base[:idx] + base[idx + 1:]
+                if alternative in base or self._has_conflict(alternative, others):
+                    continue
+                candidate = base[:idx] + [alternative] + base[idx + 1:]
+                if tuple(candidate) not in seen:
+                    seen.add(tuple(candidate))
+                    candidates.append(candidate)
+        return candidates
+    
+    def optimize_transcript_stream(self, transcript_path: str) -> Iterator[OptimizationResult]:
+        """
+        優化單個逐字稿 - 完整的疊代流程，每輪評分完成即產出該輪結果
+        
+        迭代結束（含提前停止）後保存最終結果；呼叫端提前中止迭代時不保存。
+        """
+        transcript_name, transcript, reference = self._load_transcript(transcript_path)
+        
         history = []
         
         # 開始疊代優化
@@ -922,22 +1082,11 @@ class MeetingOptimizer:
             self.logger.info(f"第 {iteration + 1}/{self.config.max_iterations} 輪優化")
             
             # 選擇策略組合
-            strategies = self._select_strategy_combination(iteration, history)
+            strategies = self._avoid_known_failures(self._select_strategy_combination(iteration, history), iteration)
             self.logger.info(f"使用策略組合: {', '.join(strategies)}")
             
             # 獲取策略改進建議（從第二輪開始）
-            improvements = None
-            if iteration > 0 and history:
-                try:
-                    # 構建歷史数據用於改進建議
-                    history_dict = {"iterations": [asdict(result) for result in history]}
-                    improvements = self._get_strategy_improvements(transcript, history_dict, reference)
-                    
-                    if improvements and "structured_suggestions" in improvements:
-                        self.logger.info("獲得結構化改進建議")
-                except Exception as e:
-                    self.logger.warning(f"獲取改進建議失敗: {e}")
-                    improvements = None
+            improvements = self._collect_improvements(iteration, history, transcript, reference)
             
             # 組裝提示詞
             prompt = self._assemble_prompt(strategies, transcript, reference, improvements)
@@ -953,6 +1102,7 @@ class MeetingOptimizer:
             # 評估結果
             self.logger.info("正在評估結果...")
             scores = self._evaluate_minutes(minutes_content, reference)
+            self._remember(iteration, strategies, scores, history)
             
             # 創建結果記錄
             result = OptimizationResult(
@@ -973,6 +1123,7 @@ class MeetingOptimizer:
             # 輸出結果
             overall_score = scores.get('overall_score', 0)
             self.logger.info(f"第 {iteration + 1} 輪完成，總分: {overall_score:.4f}")
+            yield result
             
             # 檢查是否應該提前停止
             should_stop, reason = self._should_stop_early(history)
@@ -980,7 +1131,10 @@ class MeetingOptimizer:
                 self.logger.info(f"提前停止優化: {reason}")
                 break
         
-        # 選擇最佳結果
+        self._finish_optimization(history, transcript_name)
+    
+    def _finish_optimization(self, history: List[OptimizationResult], transcript_name: str) -> OptimizationResult:
+        """選擇並保存最佳結果"""
         best_result = max(history, key=lambda x: x.scores.get('overall_score', 0))
         self.logger.info(f"優化完成，共進行 {len(history)} 輪，最佳分數: {best_result.scores.get('overall_score', 0):.4f}")
         
@@ -988,40 +1142,154 @@ class MeetingOptimizer:
         self._save_final_results(best_result, transcript_name, history)
         
         return best_result
+    
+    def optimize_transcript(self, transcript_path: str) -> OptimizationResult:
+        """優化單個逐字稿 - 完整的疊代流程"""
+        history = list(self.optimize_transcript_stream(transcript_path))
+        return max(history, key=lambda x: x.scores.get('overall_score', 0))
 
-    def optimize(self, meeting_record: str) -> Dict[str, Any]:
-        """優化會議記錄文本並返回結果字典"""
-        try:
-            # 創建臨時文件
-            import tempfile
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as tmp_file:
-                tmp_file.write(meeting_record)
-                tmp_file_path = tmp_file.name
+    async def optimize_transcript_stream_async(self, transcript_path: str) -> AsyncIterator[OptimizationResult]:
+        """
+        優化單個逐字稿 - 每輪並行生成多組候選策略組合，每輪完成即產出該輪最佳結果
+        
+        每輪以 _select_strategy_combination 的結果為基礎，衍生 candidates_per_round 組
+        候選組合並同時生成會議記錄，保留得分最高者作為該輪結果進入下一輪。
+        策略選擇與改進建議兩次 LLM 調用彼此獨立，亦同時進行。
+        """
+        transcript_name, transcript, reference = self._load_transcript(transcript_path)
+        count = max(1, self.config.candidates_per_round)
+        
+        history: List[OptimizationResult] = []
+        loop = asyncio.get_running_loop()
+        
+        for iteration in range(self.config.max_iterations):
+            self.logger.info(f"第 {iteration + 1}/{self.config.max_iterations} 輪優化")
             
-            # 使用現有的 optimize_transcript 方法
-            result = self.optimize_transcript(tmp_file_path)
+            # 選擇策略組合並獲取改進建議
+            base_strategies, improvements = await asyncio.gather(
+                loop.run_in_executor(None, self._select_strategy_combination, iteration, history),
+                loop.run_in_executor(None, self._collect_improvements, iteration, history, transcript, reference)
+            )
+            failures = self._known_failures()
+            candidates = [c for c in self._candidate_combinations(base_strategies, iteration, count + len(failures))
+                          if tuple(c) not in failures][:count] or [base_strategies]
+            for strategies in candidates:
+                self.logger.info(f"候選策略組合: {', '.join(strategies)}")
             
-            # 清理臨時文件
-            import os
-            os.unlink(tmp_file_path)
+            # 並行生成各候選組合的會議記錄
+            self.logger.info(f"正在並行生成 {len(candidates)} 份會議記錄...")
+            prompts = [self._assemble_prompt(c, transcript, reference, improvements) for c in candidates]
+            outputs = await asyncio.gather(*(loop.run_in_executor(None, self._generate_minutes, p) for p in prompts))
             
-            # 構建簡化的歷史結果
-            history = {
-                'iterations': [
-                    {
-                        'score': result.scores.get('overall_score', 0),
-                        'strategies': result.strategy_combination,
-                        'feedback': '優化完成',
-                        'improvements': '已應用策略組合'
-                    }
-                ]
-            }
+            # 評估結果，保留本輪最佳候選
+            self.logger.info("正在評估結果...")
+            round_results = []
+            # 同一輪候選一起生成完成，共用同一個時間戳
+            round_timestamp = datetime.now().isoformat()
+            for strategies, (minutes_content, exec_time) in zip(candidates, outputs):
+                if not minutes_content:
+                    continue
+                scores = self._evaluate_minutes(minutes_content, reference)
+                self._remember(iteration, strategies, scores, history)
+                round_results.append(OptimizationResult(
+                    iteration=iteration,
+                    strategy_combination=strategies,
+                    minutes_content=minutes_content,
+                    scores=scores,
+                    execution_time=exec_time,
+                    timestamp=round_timestamp,
+                    model_used=self.config.model_name
+                ))
+            
+            if not round_results:
+                self.logger.error(f"第 {iteration + 1} 輪生成失敗，跳過")
+                continue
+            
+            result = max(round_results, key=lambda x: x.scores.get('overall_score', 0))
+            history.append(result)
+            
+            # 保存疊代結果
+            self._save_iteration_result(result, transcript_name)
+            
+            overall_score = result.scores.get('overall_score', 0)
+            self.logger.info(f"第 {iteration + 1} 輪完成，最佳策略: {', '.join(result.strategy_combination)}，總分: {overall_score:.4f}")
+            yield result
+            
+            # 檢查是否應該提前停止
+            should_stop, reason = self._should_stop_early(history)
+            if should_stop:
+                self.logger.info(f"提前停止優化: {reason}")
+                break
+        
+        self._finish_optimization(history, transcript_name)
+
+    async def optimize_transcript_async(self, transcript_path: str) -> OptimizationResult:
+        """優化單個逐字稿 - 每輪並行生成多組候選策略組合"""
+        history = [result async for result in self.optimize_transcript_stream_async(transcript_path)]
+        return max(history, key=lambda x: x.scores.get('overall_score', 0))
+
+    @contextmanager
+    def _temporary_transcript(self, meeting_record: str) -> Iterator[str]:
+        """將會議記錄文本寫入臨時檔案，離開時刪除"""
+        with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as tmp_file:
+            tmp_file.write(meeting_record)
+            tmp_file_path = tmp_file.name
+        try:
+            yield tmp_file_path
+        finally:
+            if os.path.exists(tmp_file_path):
+                os.unlink(tmp_file_path)
+
+    def optimize_stream(self, meeting_record: str) -> Iterator[OptimizationResult]:
+        """優化會議記錄文本，每輪評分完成即產出該輪結果"""
+        with self._temporary_transcript(meeting_record) as tmp_file_path:
+            yield from self.optimize_transcript_stream(tmp_file_path)
+
+    async def optimize_stream_async(self, meeting_record: str) -> AsyncIterator[OptimizationResult]:
+        """以並行候選生成優化會議記錄文本，每輪完成即產出該輪最佳結果"""
+        with self._temporary_transcript(meeting_record) as tmp_file_path:
+            async for result in self.optimize_transcript_stream_async(tmp_file_path):
+                yield result
+
+    def _summarize_result(self, result: OptimizationResult) -> Dict[str, Any]:
+        """將最佳優化結果轉為 optimize 的返回格式"""
+        # 構建簡化的歷史結果
+        history = {
+            'iterations': [
+                {
+                    'score': result.scores.get('overall_score', 0),
+                    'strategies': result.strategy_combination,
+                    'feedback': '優化完成',
+                    'improvements': '已應用策略組合'
+                }
+            ]
+        }
+        
+        return {
+            'final_score': result.scores.get('overall_score', 0),
+            'improvement': 0.0,  # 單輪優化無法計算改進幅度
+            'iterations': history['iterations']
+        }
+
+    async def optimize_async(self, meeting_record: str) -> Dict[str, Any]:
+        """以並行候選生成優化會議記錄文本並返回結果字典"""
+        try:
+            history = [result async for result in self.optimize_stream_async(meeting_record)]
+            return self._summarize_result(max(history, key=lambda x: x.scores.get('overall_score', 0)))
             
+        except Exception as e:
+            self.logger.error(f"優化過程發生錯誤: {e}")
             return {
-                'final_score': result.scores.get('overall_score', 0),
-                'improvement': 0.0,  # 單輪優化無法計算改進幅度
-                'iterations': history['iterations']
+                'final_score': 0.0,
+                'improvement': 0.0,
+                'iterations': []
             }
+
+    def optimize(self, meeting_record: str) -> Dict[str, Any]:
+        """優化會議記錄文本並返回結果字典"""
+        try:
+            history = list(self.optimize_stream(meeting_record))
+            return self._summarize_result(max(history, key=lambda x: x.scores.get('overall_score', 0)))
             
         except Exception as e:
             self.logger.error(f"優化過程發生錯誤: {e}")
@@ -1254,6 +1522,46 @@ class MeetingOptimizer:
         # 默認策略組合
         available_strategies = list(self.strategies.keys())
         return available_strategies[:min(self.config.strategy_max_count, len(available_strategies))]
+
+
+def run(config: OptimizationConfig, transcript_dir: str = "data/transcript",
+        transcript_file: Optional[str] = None, deadline: Optional[float] = None) -> Dict[str, Any]:
+    """
+    在目前程序內優化目錄（或單一檔案）中的所有逐字稿，供 CLI 與其他工具直接調用
+    
+    deadline 為 time.monotonic() 的截止時間，超過後不再開始新的一輪，並標記 timed_out。
+    返回各逐字稿的每輪分數與最佳分數，以及處理失敗的錯誤訊息。
+    """
+    optimizer = MeetingOptimizer(config)
+    transcript_files = [transcript_file] if transcript_file else glob(os.path.join(transcript_dir, "*.txt"))
+    
+    summary: Dict[str, Any] = {"transcripts": {}, "errors": [], "timed_out": False}
+    for path in transcript_files:
+        if deadline is not None and time.monotonic() >= deadline:
+            summary["timed_out"] = True
+            break
+        round_scores: List[float] = []
+        try:
+            for result in optimizer.optimize_transcript_stream(path):
+                round_scores.append(result.scores.get('overall_score', 0))
+                if deadline is not None and time.monotonic() >= deadline:
+                    summary["timed_out"] = True
+                    break
+        except Exception as e:
+            print(f"處理 {path} 時發生錯誤: {e}")
+            summary["errors"].append(f"{path}: {e}")
+        if round_scores:
+            summary["transcripts"][Path(path).stem] = {
+                "round_scores": round_scores,
+                "iterations": len(round_scores),
+                "best_score": max(round_scores)
+            }
+        if summary["timed_out"]:
+            break
+    
+    return summary
+
+
 def main():
     """主程式"""
     parser = argparse.ArgumentParser(description="會議記錄優化與評估系統")
@@ -1277,6 +1585,8 @@ def main():
                        help="語意分段模型")
     parser.add_argument("--max-segment-length", type=int, default=4000,
                        help="最大分段長度")
+    parser.add_argument("--output-dir", type=str, default="results",
+                       help="結果輸出根目錄")
     
     args = parser.parse_args()
     
@@ -1289,31 +1599,19 @@ def main():
         enable_early_stopping=not args.disable_early_stopping,
         enable_semantic_segmentation=args.enable_semantic_segmentation,
         semantic_model=args.semantic_model,
-        max_segment_length=args.max_segment_length
+        max_segment_length=args.max_segment_length,
+        output_dir=args.output_dir
     )
     
-    # 創建優化器
-    optimizer = MeetingOptimizer(config)
-    
-    # 確定要處理的檔案
-    if args.transcript_file:
-        transcript_files = [args.transcript_file]
-    else:
-        transcript_files = glob(os.path.join(args.transcript_dir, "*.txt"))
-    
-    if not transcript_files:
+    if not args.transcript_file and not glob(os.path.join(args.transcript_dir, "*.txt")):
         print(f"在 {args.transcript_dir} 中找不到逐字稿檔案")
         return
     
     # 處理每個逐字稿
-    for transcript_file in transcript_files:
-        try:
-            optimizer.optimize_transcript(transcript_file)
-        except Exception as e:
-            print(f"處理 {transcript_file} 時發生錯誤: {e}")
-            continue
+    run(config, args.transcript_dir, args.transcript_file)
     
     print("所有優化任務完成！")
 
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM 呼叫輔助工具
+提供提示詞快取，避免對 Ollama 重複送出相同或近似的請求，以及結果 JSON 的輸出
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+def make_prompt_key(model: str, temperature: float, prompt: str) -> str:
+    """以模型、溫度與提示詞計算 SHA-256 快取鍵"""
+    return hashlib.sha256(f"{model}|{temperature}|{prompt}".encode("utf-8")).hexdigest()
+
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def extract_json(text: str) -> Optional[Dict[str, Any]]:
+    """
+    從 LLM 回應中擷取第一個 JSON 物件
+
+    自每個 '{' 起以 JSONDecoder.raw_decode 解析，解析到物件結尾即停止，
+    不需先以 r'\{.*\}' 掃描至字串尾再回溯，也不受物件後方文字影響。
+
+    Returns:
+        解析出的字典；找不到合法 JSON 物件時回傳 None
+    """
+    # 以 JSON 模式生成的回應通常整段就是一個物件，先以 orjson 直接解析
+    stripped = text.strip()
+    if stripped.startswith("{") and stripped.endswith("}"):
+        try:
+            import orjson
+            result = orjson.loads(stripped)
+            if isinstance(result, dict):
+                return result
+        except (ImportError, ValueError):
+            pass
+
+    start = text.find("{")
+    while start >= 0:
+        try:
+            result, _ = _JSON_DECODER.raw_decode(text, start)
+            return result
+        except ValueError:
+            start = text.find("{", start + 1)
+    return None
+
+
+def read_ollama_stream(response) -> str:
+    """
+    串接 Ollama 串流回應（stream=True）中各行的 response 片段
+
+    Ollama 串流時每行為一個 JSON 物件，最後一行帶有 "done": true；
+    伺服器於生成途中出錯時該行帶有 "error"，此時拋出 RuntimeError。
+    """
+    parts = []
+    for line in response.iter_lines():
+        if not line:
+            continue
+        chunk = json.loads(line)
+        if "error" in chunk:
+            raise RuntimeError(chunk["error"])
+        parts.append(chunk.get("response", ""))
+        if chunk.get("done"):
+            break
+    return "".join(parts)
+
+
+def read_text_file(path: Union[str, Path]) -> str:
+    """讀取 UTF-8 文字檔，換行符號比照文字模式統一轉為 \\n"""
+    return Path(path).read_text(encoding='utf-8')
+
+
+def write_bytes_atomic(path: Union[str, Path], data: bytes) -> None:
+    """
+    先寫入同目錄的暫存檔再以 os.replace 取代目標檔
+
+    中途失敗時不會留下寫到一半的輸出檔。
+    """
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_json(path: Union[str, Path], data: Any) -> None:
+    """
+    以縮排 2 格的 UTF-8 JSON 寫入檔案
+
+    優先以 orjson 直接序列化為 bytes，未安裝時退回標準庫 json；
+    序列化完成後一次寫出。
+    """
+    try:
+        import orjson
+    except ImportError:
+        payload = json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    else:
+        payload = orjson.dumps(
+            data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    write_bytes_atomic(path, payload)
+
+
+class SemanticCache:
+    """
+    記憶體內的語意快取
+
+    查詢時先以快取鍵做精確比對（O(1)）；未命中且提供了向量化函數時，
+    將提示詞向量化後與同一命名空間內的既有向量計算餘弦相似度，
+    最高相似度達門檻即回傳該提示詞的回應。
+    """
+
+    def __init__(self,
+                 embed_fn: Optional[Callable[[str], Optional[List[float]]]] = None,
+                 threshold: float = 0.95):
+        """
+        初始化語意快取
+
+        Args:
+            embed_fn: 提示詞向量化函數，失敗時回傳 None；為 None 時僅做精確比對
+            threshold: 視為命中的最低餘弦相似度
+        """
+        self.embed_fn = embed_fn
+        self.threshold = threshold
+        self._exact: Dict[str, str] = {}
+        # 每個命名空間（模型與溫度）各自維護正規化向量矩陣與對應回應
+        self._matrices: Dict[str, np.ndarray] = {}
+        self._responses: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0}
+
+    def _embed(self, prompt: str) -> Optional[np.ndarray]:
+        """向量化並正規化提示詞"""
+        if self.embed_fn is None:
+            return None
+        embedding = self.embed_fn(prompt)
+        if not embedding:
+            return None
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(vector))
+        if norm == 0.0:
+            return None
+        return vector / norm
+
+    def lookup(self, key: str, prompt: str,
+               namespace: str = "") -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        查詢快取
+
+        Returns:
+            (快取回應或 None, 提示詞向量)；向量可於未命中時交給 store 重複使用
+        """
+        with self._lock:
+            if key in self._exact:
+                self.stats["exact_hits"] += 1
+                return self._exact[key], None
+
+        vector = self._embed(prompt)
+        if vector is not None:
+            with self._lock:
+                matrix = self._matrices.get(namespace)
+                if matrix is not None:
+                    similarities = matrix @ vector
+                    best = int(np.argmax(similarities))
+                    if similarities[best] >= self.threshold:
+                        self.stats["semantic_hits"] += 1
+                        return self._responses[namespace][best], vector
+
+        with self._lock:
+            self.stats["misses"] += 1
+        return None, vector
+
+    def store(self, key: str, response: str, namespace: str = "",
+              vector: Optional[np.ndarray] = None) -> None:
+        """寫入快取；提供向量時一併加入語意比對"""
+        with self._lock:
+            self._exact[key] = response
+            if vector is None:
+                return
+            matrix = self._matrices.get(namespace)
+            self._matrices[namespace] = (
+                vector[np.newaxis, :] if matrix is None else np.vstack([matrix, vector])
+            )
+            self._responses.setdefault(namespace, []).append(response)
+
+
+class PromptCache:
+    """
+    以 sqlite 持久化的精確比對提示詞快取
+
+    以 make_prompt_key 產生的鍵儲存 LLM 回應，讓重跑相同資料時不必再次呼叫模型。
+    開啟資料庫失敗時自動停用，不影響正常流程。
+    """
+
+    DEFAULT_PATH = Path.home() / ".cache" / "exam08" / "prompt_cache.sqlite3"
+
+    def __init__(self,
+                 path: Optional[Union[str, Path]] = None,
+                 ttl_seconds: Optional[int] = None,
+                 enabled: bool = True):
+        """
+        初始化提示詞快取
+
+        Args:
+            path: sqlite 檔案路徑，預設為 ~/.cache/exam08/prompt_cache.sqlite3
+            ttl_seconds: 快取有效秒數，None 表示永不過期
+            enabled: 是否啟用快取
+        """
+        self.ttl_seconds = ttl_seconds
+        self.stats = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+        if not enabled:
+            return
+        db_path = Path(path) if path else self.DEFAULT_PATH
+        try:
+            db_path.parent.mkdir(parents=True, exist_ok=True)
+            # 同一檔案可能由多個實例（分段器、評估器、處理器）同時開啟，
+            # 使用 WAL 並設定等待時間，避免並行寫入時出現 database is locked
+            self._conn = sqlite3.connect(str(db_path), timeout=30, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS prompt_cache "
+                "(key TEXT PRIMARY KEY, response TEXT NOT NULL, ts INTEGER NOT NULL)"
+            )
+            self._conn.commit()
+        except (OSError, sqlite3.Error):
+            self._conn = None
+
+    @property
+    def enabled(self) -> bool:
+        """是否已成功開啟快取資料庫"""
+        return self._conn is not None
+
+    def get(self, key: str) -> Optional[str]:
+        """查詢快取，未命中或已過期時回傳 None"""
+        if self._conn is None:
+            return None
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT response, ts FROM prompt_cache WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.Error:
+                row = None
+            if row and (self.ttl_seconds is None or time.time() - row[1] <= self.ttl_seconds):
+                self.stats["hits"] += 1
+                return row[0]
+            self.stats["misses"] += 1
+            return None
+
+    def set(self, key: str, response: str) -> None:
+        """寫入或更新快取"""
+        if self._conn is None:
+            return
+        with self._lock:
+            # 快取寫入失敗不影響主流程
+            try:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO prompt_cache (key, response, ts) VALUES (?, ?, ?)",
+                    (key, response, int(time.time()))
+                )
+                self._conn.commit()
+            except sqlite3.Error:
+                pass
+
+    def close(self) -> None:
+        """關閉資料庫連線"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class MinHashIndex:
+    """
+    以 MinHash + LSH 尋找近似重複文本的記憶體索引
+
+    文本以字元 n-gram 集合表示，MinHash 簽章的相同比例即為 Jaccard 相似度的估計；
+    簽章切成多個 band 放入雜湊桶，查詢時只比對落在相同桶中的候選文本。
+    """
+
+    # 大於 2^32 的質數，確保 a * h + b 在 uint64 範圍內不溢位
+    _PRIME = np.uint64(4294967311)
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128,
+                 bands: int = 32, ngram: int = 3, seed: int = 1):
+        """
+        初始化索引
+
+        Args:
+            threshold: 視為近似重複的最低估計 Jaccard 相似度
+            num_perm: 簽章長度（雜湊函數個數），須為 bands 的倍數
+            bands: LSH band 數
+            ngram: 字元 n-gram 長度
+            seed: 雜湊參數的亂數種子
+        """
+        rng = np.random.default_rng(seed)
+        self.threshold = threshold
+        self.ngram = ngram
+        self.bands = bands
+        self.rows = num_perm // bands
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._signatures: List[np.ndarray] = []
+        self._responses: List[str] = []
+        self._buckets: Dict[Tuple[str, int, bytes], List[int]] = {}
+        self._lock = threading.Lock()
+
+    def signature(self, text: str) -> Optional[np.ndarray]:
+        """計算文本的 MinHash 簽章；文本短於 n-gram 長度時回傳 None"""
+        n = self.ngram
+        grams = {text[i:i + n] for i in range(len(text) - n + 1)}
+        if not grams:
+            return None
+        hashes = np.fromiter(
+            (zlib.crc32(gram.encode("utf-8")) for gram in grams),
+            dtype=np.uint64, count=len(grams)
+        )
+        return ((self._a[:, np.newaxis] * hashes + self._b[:, np.newaxis]) % self._PRIME).min(axis=1)
+
+    def _band_keys(self, namespace: str, signature: np.ndarray) -> List[Tuple[str, int, bytes]]:
+        rows = self.rows
+        return [
+            (namespace, band, signature[band * rows:(band + 1) * rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def query(self, namespace: str, text: str) -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        查詢近似重複文本的回應
+
+        Returns:
+            (回應或 None, 簽章)；簽章可於未命中時交給 add 重複使用
+        """
+        signature = self.signature(text)
+        if signature is None:
+            return None, None
+        with self._lock:
+            candidates = set()
+            for key in self._band_keys(namespace, signature):
+                candidates.update(self._buckets.get(key, ()))
+            best_index, best_similarity = -1, 0.0
+            for index in candidates:
+                similarity = float(np.mean(self._signatures[index] == signature))
+                if similarity > best_similarity:
+                    best_index, best_similarity = index, similarity
+            if best_index >= 0 and best_similarity >= self.threshold:
+                return self._responses[best_index], signature
+        return None, signature
+
+    def add(self, namespace: str, text: str, response: str,
+            signature: Optional[np.ndarray] = None) -> None:
+        """加入文本與其回應"""
+        if signature is None:
+            signature = self.signature(text)
+            if signature is None:
+                return
+        with self._lock:
+            index = len(self._signatures)
+            self._signatures.append(signature)
+            self._responses.append(response)
+            for key in self._band_keys(namespace, signature):
+                self._buckets.setdefault(key, []).append(index)
+
+
+class SegmentResponseCache:
+    """
+    逐段 LLM 回應快取
+
+    依序查詢記憶體與 sqlite 的精確比對（鍵由模型、溫度與提示詞計算），
+    啟用近似比對時再以 MinHash 尋找內容高度重疊的已處理段落。
+    """
+
+    def __init__(self,
+                 path: Optional[Union[str, Path]] = None,
+                 ttl_seconds: Optional[int] = None,
+                 enabled: bool = True,
+                 near_duplicate_threshold: Optional[float] = None):
+        """
+        初始化段落回應快取
+
+        Args:
+            path: sqlite 檔案路徑，預設與 PromptCache 相同
+            ttl_seconds: 持久化快取有效秒數，None 表示永不過期
+            enabled: 是否啟用快取
+            near_duplicate_threshold: 近似重複比對的 Jaccard 門檻，None 表示停用
+        """
+        self.enabled = enabled
+        self._memory = SemanticCache()
+        self._store = PromptCache(path=path, ttl_seconds=ttl_seconds, enabled=enabled)
+        self._near = (
+            MinHashIndex(threshold=near_duplicate_threshold)
+            if enabled and near_duplicate_threshold is not None else None
+        )
+
+    def get(self, key: str, text: str, namespace: str = "") -> Tuple[Optional[str], Optional[np.ndarray]]:
+        """
+        查詢快取
+
+        Args:
+            key: make_prompt_key 產生的精確比對鍵
+            text: 段落內容，供近似比對使用
+            namespace: 模型與提示詞種類，近似比對只在同一命名空間內進行
+
+        Returns:
+            (快取回應或 None, MinHash 簽章)；簽章可於未命中時交給 set 重複使用
+        """
+        if not self.enabled:
+            return None, None
+        cached, _ = self._memory.lookup(key, text)
+        if cached is not None:
+            return cached, None
+        cached = self._store.get(key)
+        if cached is not None:
+            self._memory.store(key, cached)
+            return cached, None
+        if self._near is None:
+            return None, None
+        return self._near.query(namespace, text)
+
+    def set(self, key: str, text: str, response: str, namespace: str = "",
+            signature: Optional[np.ndarray] = None) -> None:
+        """寫入快取"""
+        if not self.enabled:
+            return
+        self._memory.store(key, response)
+        self._store.set(key, response)
+        if self._near is not None:
+            self._near.add(namespace, text, response, signature)
+
+    def close(self) -> None:
+        """關閉持久化快取"""
+        self._store.close()
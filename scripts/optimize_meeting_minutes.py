@@ -38,6 +38,11 @@ except ImportError:
             def __init__(self):
                 pass
 
+try:
+    from scripts.llm_utils import read_text_file
+except ImportError:
+    from llm_utils import read_text_file
+
 # 導入語意分段相關模組
 SEMANTIC_MODULES_AVAILABLE = False
 SemanticSplitter = None
@@ -138,6 +143,9 @@ class OptimizationConfig:
 
 evaluator_class = get_evaluator_class()
 
+# 評估結果中的分數皆為內建 int/float，以精確型別查表取代 isinstance 的 MRO 檢查（同時排除 bool）
+_NUMERIC_TYPES = frozenset({int, float})
+
 class StrategyConfig:
     """Strategy configuration"""
     def __init__(self, name: str, description: str, components: Dict[str, Any], 
@@ -837,38 +845,36 @@ class MeetingOptimizer:
                 if match:
                     number = match.group(1)
                     year = int(match.group(2)) + 1911  # 民國年轉西元年
-                    month = match.group(3).zfill(2)
-                    day = match.group(4).zfill(2)
                     
                     info["number"] = number
                     info["topic"] = f"第{number}次市政會議"
-                    info["date"] = f"{year}年{month}月{day}日"
+                    info["date"] = f"{year}年{int(match.group(3)):02d}月{int(match.group(4)):02d}日"
             except Exception as e:
                 self.logger.error(f"解析檔名時發生錯誤: {str(e)}")
 
-        # 2. 從逐字稿內容萃取資訊
+        # 2. 從逐字稿內容萃取資訊（僅針對檔名未提供的欄位掃描全文）
         if transcript:
             try:
                 # 嘗試找出會議編號和主題
-                match = re.search(r'召開台中市政府第(\d+)次市政會議', transcript)
-                if match and not info["number"]:
-                    number = match.group(1)
-                    info["number"] = number
-                    info["topic"] = f"第{number}次市政會議"
+                if not info["number"]:
+                    match = re.search(r'召開台中市政府第(\d+)次市政會議', transcript)
+                    if match:
+                        number = match.group(1)
+                        info["number"] = number
+                        info["topic"] = f"第{number}次市政會議"
 
                 # 如果檔名未提供日期，嘗試從內容萃取
                 if not info["date"]:
                     date_match = re.search(r'(\d{3})年(\d{1,2})月(\d{1,2})日', transcript)
                     if date_match:
                         year = int(date_match.group(1)) + 1911  # 民國年轉西元年
-                        month = date_match.group(2).zfill(2)
-                        day = date_match.group(3).zfill(2)
-                        info["date"] = f"{year}年{month}月{day}日"
+                        info["date"] = f"{year}年{int(date_match.group(2)):02d}月{int(date_match.group(3)):02d}日"
 
                 # 嘗試找出與會人員
-                participants_match = re.search(r'各位([\w、，]+)大家好', transcript)
-                if participants_match:
-                    info["participants"] = participants_match.group(1).replace("、", "、").replace("，", "、")
+                if not info["participants"]:
+                    participants_match = re.search(r'各位([\w、，]+)大家好', transcript)
+                    if participants_match:
+                        info["participants"] = participants_match.group(1).replace("、", "、").replace("，", "、")
             except Exception as e:
                 self.logger.error(f"解析逐字稿內容時發生錯誤: {str(e)}")
 
@@ -883,7 +889,7 @@ class MeetingOptimizer:
                     eval_result = self.evaluator.evaluate(gen, ref)
                     
                     # 首先處理 overall_score
-                    if 'overall_score' in eval_result and isinstance(eval_result['overall_score'], (int, float)):
+                    if 'overall_score' in eval_result and type(eval_result['overall_score']) in _NUMERIC_TYPES:
                         if 'overall_score' not in scores:
                             scores['overall_score'] = 0.0
                         scores['overall_score'] += eval_result['overall_score'] / len(generated_minutes)
@@ -892,7 +898,7 @@ class MeetingOptimizer:
                     for metric, value in eval_result.items():
                         if metric == 'overall_score':
                             continue  # 已經處理過
-                        elif isinstance(value, (int, float)):
+                        elif type(value) in _NUMERIC_TYPES:
                             # 直接是數值的分數
                             if metric not in scores:
                                 scores[metric] = 0.0
@@ -900,7 +906,7 @@ class MeetingOptimizer:
                         elif isinstance(value, dict) and 'score' in value:
                             # 包含 score 鍵的字典
                             score_val = value['score']
-                            if isinstance(score_val, (int, float)):
+                            if type(score_val) in _NUMERIC_TYPES:
                                 metric_name = f"{metric}_score"
                                 if metric_name not in scores:
                                     scores[metric_name] = 0.0
@@ -910,7 +916,7 @@ class MeetingOptimizer:
                             for cat_name, cat_data in value.items():
                                 if isinstance(cat_data, dict) and 'score' in cat_data:
                                     cat_score = cat_data['score']
-                                    if isinstance(cat_score, (int, float)):
+                                    if type(cat_score) in _NUMERIC_TYPES:
                                         metric_name = f"{cat_name}_score"
                                         if metric_name not in scores:
                                             scores[metric_name] = 0.0
@@ -1012,7 +1018,12 @@ B. 策略參數建議（如哪些重點要強化、哪些格式要調整，請
                 timeout=300
             )
             if response.status_code == 200:
-                result = response.json()
+                # 直接以 bytes 交給 orjson 解析，省去 response.text 的解碼與 stdlib json 的開銷
+                try:
+                    import orjson
+                    result = orjson.loads(response.content)
+                except ImportError:
+                    result = response.json()
                 content = result.get("response", "")
                 # 解析 LLM 回傳格式
                 template = None
@@ -1050,8 +1061,7 @@ def process_transcript(
     if reference_dir is None:
         reference_dir = transcript_path.parent.parent / "reference"
     transcript_file = transcript_path.name
-    with open(transcript_path, "r", encoding="utf-8") as f:
-        transcript = f.read()
+    transcript = read_text_file(transcript_path)
 
     # 嘗試自動尋找 reference 檔案
     base_name = Path(transcript_file).stem
@@ -1067,8 +1077,7 @@ def process_transcript(
         print(f"[警告] 找不到對應的 reference 檔案於 {reference_dir}，將僅以逐字稿產生 minutes。")
         reference = transcript  # 直接用逐字稿作為 reference，允許產生 minutes
     else:
-        with open(ref_file, "r", encoding="utf-8") as f:
-            reference = f.read()
+        reference = read_text_file(ref_file)
 
     matched_data = [{
         "transcript": transcript,
@@ -32,6 +32,26 @@ PROMPT_COMPONENTS = {
     ]
 }
 
+# 各組件在提示詞中的順序與章節標題（角色定義不加標題與項目符號）
+_SECTION_TITLES = (
+    ('role_definition', None),
+    ('format_guidelines', '格式要求'),
+    ('content_guidelines', '內容要求'),
+    ('style_guidelines', '風格要求'),
+)
+
+def _render_block(title: Optional[str], items: List[str]) -> str:
+    """將單一組件渲染為提示詞區塊"""
+    if title is None:
+        return "\n".join(items)
+    return f"\n\n## {title}\n" + "\n".join(f"- {g}" for g in items)
+
+# 預設組件於模組載入時預先渲染，assemble_prompt 使用預設組件時直接取用
+_DEFAULT_BLOCKS = {
+    key: _render_block(title, PROMPT_COMPONENTS[key]) for key, title in _SECTION_TITLES
+}
+_DEFAULT_PROMPT = "\n\n".join(_DEFAULT_BLOCKS[key] for key, _ in _SECTION_TITLES)
+
 def load_prompt_components(config_path: Optional[str] = None) -> Dict[str, List[str]]:
     """
     從配置檔案載入提示詞組件
@@ -63,26 +83,23 @@ def assemble_prompt(components: Dict[str, List[str]],
     Returns:
         組裝後的提示詞字串
     """
+    if components is PROMPT_COMPONENTS:
+        if include_sections is None:
+            return _DEFAULT_PROMPT
+        rendered = _DEFAULT_BLOCKS
+    else:
+        rendered = None
+    
     if include_sections is None:
         include_sections = list(components.keys())
     
     prompt_parts = []
-    
-    # 添加角色定義（如果存在）
-    if 'role_definition' in include_sections and 'role_definition' in components:
-        prompt_parts.append("\n".join(components['role_definition']))
-    
-    # 添加格式指南
-    if 'format_guidelines' in include_sections and 'format_guidelines' in components:
-        prompt_parts.append("\n\n## 格式要求\n" + "\n".join([f"- {g}" for g in components['format_guidelines']]))
-    
-    # 添加內容指南
-    if 'content_guidelines' in include_sections and 'content_guidelines' in components:
-        prompt_parts.append("\n\n## 內容要求\n" + "\n".join([f"- {g}" for g in components['content_guidelines']]))
-    
-    # 添加風格指南
-    if 'style_guidelines' in include_sections and 'style_guidelines' in components:
-        prompt_parts.append("\n\n## 風格要求\n" + "\n".join([f"- {g}" for g in components['style_guidelines']]))
+    for key, title in _SECTION_TITLES:
+        if key in include_sections and key in components:
+            if rendered is not None:
+                prompt_parts.append(rendered[key])
+            else:
+                prompt_parts.append(_render_block(title, components[key]))
     
     return "\n\n".join(prompt_parts)
 
@@ -139,6 +156,15 @@ def generate_prompt_variations(base_prompt: str,
     
     return variations[:num_variations]
 
+# 範例分析可能萃取出的指南，以位元旗標記錄偵測結果（第 i 位對應第 i 項）
+_FORMAT_LITERALS = (
+    "使用Markdown格式進行結構化輸出",
+    "包含標準章節：與會人員、會議議程、決議事項等",
+)
+_CONTENT_LITERALS = (
+    "明確標記行動項目和負責人",
+)
+
 def extract_components_from_examples(examples: List[Dict[str, str]]) -> Dict[str, List[str]]:
     """
     從範例中提取提示詞組件
@@ -149,11 +175,8 @@ def extract_components_from_examples(examples: List[Dict[str, str]]) -> Dict[str
     Returns:
         提取的提示詞組件字典
     """
-    components = {
-        'format_guidelines': set(),
-        'content_guidelines': set(),
-        'style_guidelines': set()
-    }
+    format_flags = 0
+    content_flags = 0
     
     for example in examples:
         # 分析輸出格式
@@ -162,20 +185,27 @@ def extract_components_from_examples(examples: List[Dict[str, str]]) -> Dict[str
             
             # 檢測Markdown格式
             if any(mark in output for mark in ['# ', '## ', '- [ ]', '1. ']):
-                components['format_guidelines'].add("使用Markdown格式進行結構化輸出")
+                format_flags |= 1 << 0
             
             # 檢測結構化內容
             if any(sec in output.lower() for sec in ['## 與會人員', '## 會議議程', '## 決議事項']):
-                components['format_guidelines'].add("包含標準章節：與會人員、會議議程、決議事項等")
+                format_flags |= 1 << 1
             
             # 檢測行動項目
             if any(mark in output for mark in ['- [ ]', '行動項目', '待辦事項']):
-                components['content_guidelines'].add("明確標記行動項目和負責人")
+                content_flags |= 1 << 0
     
-    # 轉換為列表並添加預設值
+    # 依旗標還原為列表，未偵測到任何項目時使用預設值
     result = {}
-    for key, items in components.items():
-        result[key] = list(items) if items else PROMPT_COMPONENTS.get(key, [])
+    for key, literals, flags in (
+        ('format_guidelines', _FORMAT_LITERALS, format_flags),
+        ('content_guidelines', _CONTENT_LITERALS, content_flags),
+        ('style_guidelines', (), 0),
+    ):
+        if flags:
+            result[key] = [literal for i, literal in enumerate(literals) if flags & (1 << i)]
+        else:
+            result[key] = PROMPT_COMPONENTS.get(key, [])
     
     # 添加角色定義
     result['role_definition'] = PROMPT_COMPONENTS['role_definition']
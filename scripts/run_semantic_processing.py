@@ -17,6 +17,11 @@ sys.path.insert(0, str(script_dir))
 
 from semantic_meeting_processor import SemanticMeetingProcessor
 
+try:
+    from scripts.llm_utils import read_text_file
+except ImportError:
+    from llm_utils import read_text_file
+
 
 def main():
     parser = argparse.ArgumentParser(description="語意分段會議記錄處理器")
@@ -116,8 +121,7 @@ def main():
             print(f"開始處理文件: {args.input}")
             
             # 讀取文件
-            with open(args.input, 'r', encoding='utf-8') as f:
-                content = f.read()
+            content = read_text_file(args.input)
             
             # 處理文件
             result = processor.process_transcript(
@@ -5,30 +5,124 @@
 提供多維度品質指標和自動化檢查機制
 """
 
+import math
 import os
-import json
 import logging
-import re
 import statistics
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from difflib import SequenceMatcher
 from typing import List, Dict, Tuple, Optional, Any, Union
 from datetime import datetime
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from .llm_utils import PromptCache, SemanticCache, extract_json, make_prompt_key, write_json
+except ImportError:
+    # 當作為腳本直接執行時的回退導入
+    from llm_utils import PromptCache, SemanticCache, extract_json, make_prompt_key, write_json
+
+# 各實例共用的日誌格式
+_LOG_FORMATTER = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+# 邊界評估提示詞中固定不變的評分說明
+_BOUNDARY_PROMPT_INSTRUCTIONS = """
+請從以下角度為每組邊界評分（0-10分）：
+1. 語意切分是否自然
+2. 是否在句子中間切斷
+3. 主題轉換是否合理
+4. 資訊是否有遺漏或重複
+
+請以JSON格式回答，scores 中每組邊界一筆，id 為上方的邊界編號：
+{
+    "scores": [
+        {"id": 邊界編號, "boundary_score": 分數, "is_natural_break": true/false}
+    ]
+}
+"""
 
 class SegmentQualityEvaluator:
     """分段品質評估器"""
     
+    # 分段開頭／結尾不應出現的標點符號
+    _LEAD_PUNCT = frozenset("，。、；：")
+    _TRAIL_PUNCT = frozenset("，、；：")
+    # 句末標點
+    _SENTENCE_END = frozenset("。！？!?")
+    # 各評估階段的回應只是簡短 JSON，依內容量限制生成 token 數
+    _NUM_PREDICT = {
+        "boundary": 512,
+        "coverage": 256,
+        "suggestion": 512,
+        "coherence": 512
+    }
+    
     def __init__(self, 
                  model_name: str = "gemma3:12b",
-                 ollama_url: str = "http://localhost:11434/api/generate"):
+                 ollama_url: str = "http://localhost:11434/api/generate",
+                 num_parallel: Optional[int] = None,
+                 boundary_batch_size: int = 8,
+                 semantic_cache: bool = False,
+                 semantic_cache_threshold: float = 0.95,
+                 embedding_model: str = "nomic-embed-text",
+                 prompt_cache: bool = True,
+                 prompt_cache_path: Optional[str] = None,
+                 prompt_cache_ttl: Optional[int] = 7 * 24 * 3600,
+                 keep_alive: str = "30m"):
         """
         初始化品質評估器
         
         Args:
             model_name: Ollama 模型名稱
             ollama_url: Ollama API 端點
+            num_parallel: 同時送出的 Ollama 請求上限，應與伺服器端
+                OLLAMA_NUM_PARALLEL 一致；未指定時讀取同名環境變數，預設 4
+            boundary_batch_size: 邊界評估時合併於同一提示詞的邊界數
+            semantic_cache: 是否以提示詞向量相似度重用近似提示詞的回應
+                （相同提示詞一律直接重用，不受此選項影響）
+            semantic_cache_threshold: 語意快取命中的最低餘弦相似度
+            embedding_model: 語意快取使用的 Ollama 向量模型
+            prompt_cache: 是否將回應持久化，重跑相同分段時直接重用
+            prompt_cache_path: 持久化快取的 sqlite 路徑，預設置於 ~/.cache/exam08
+            prompt_cache_ttl: 持久化快取有效秒數，None 表示永不過期
+            keep_alive: 模型在 Ollama 中保持載入的時間，避免各評估階段之間被卸載
         """
         self.model_name = model_name
         self.ollama_url = ollama_url
+        if num_parallel is None:
+            num_parallel = int(os.environ.get("OLLAMA_NUM_PARALLEL", 4))
+        self.num_parallel = max(1, num_parallel)
+        self.boundary_batch_size = max(1, boundary_batch_size)
+        self.keep_alive = keep_alive
+        # 模型預熱狀態：首次實際調用前先載入模型，冷啟動延遲不計入任何評估階段
+        self._warm = False
+        self._warm_lock = threading.Lock()
+        # 各評估階段可能同時送出請求，以號誌限制總並行數不超過 num_parallel
+        self._request_slots = threading.BoundedSemaphore(self.num_parallel)
+        
+        # 共用連線池，保持 keep-alive 以避免每次請求重新建立 TCP 連線
+        self.session = requests.Session()
+        self.session.headers.update({"Connection": "keep-alive"})
+        self.session.mount("http://", HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.num_parallel,
+            max_retries=Retry(total=2, backoff_factor=0.3)
+        ))
+        self.embedding_model = embedding_model
+        self.embed_url = ollama_url.rsplit("/api/", 1)[0] + "/api/embed"
+        self.llm_cache = SemanticCache(
+            embed_fn=self._embed_prompt if semantic_cache else None,
+            threshold=semantic_cache_threshold
+        )
+        self.prompt_cache = PromptCache(
+            path=prompt_cache_path,
+            ttl_seconds=prompt_cache_ttl,
+            enabled=prompt_cache
+        )
         self.logger = self._setup_logger()
         
         # 品質評估標準
@@ -44,39 +138,134 @@ class SegmentQualityEvaluator:
         logger = logging.getLogger(f"QualityEvaluator_{self.model_name}")
         logger.setLevel(logging.INFO)
         
+        # 同名記錄器只掛一次處理器，重複建立實例時直接沿用
         if not logger.handlers:
             handler = logging.StreamHandler()
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
+            handler.setFormatter(_LOG_FORMATTER)
             logger.addHandler(handler)
             
         return logger
     
-    def _call_ollama(self, prompt: str, temperature: float = 0.2) -> str:
-        """調用 Ollama API"""
+    def _embed_prompt(self, prompt: str) -> Optional[List[float]]:
+        """以 Ollama /api/embed 取得提示詞向量，失敗時回傳 None"""
+        try:
+            response = self.session.post(
+                self.embed_url,
+                json={"model": self.embedding_model, "input": prompt},
+                timeout=60
+            )
+            response.raise_for_status()
+            embeddings = response.json().get("embeddings") or [None]
+            return embeddings[0]
+        except Exception as e:
+            self.logger.warning(f"提示詞向量化失敗: {e}")
+            return None
+    
+    def _warm_up(self) -> None:
+        """
+        預熱模型（每個評估器實例只執行一次）
+        
+        送出不含提示詞的請求，Ollama 只會載入模型而不進行生成。
+        預熱失敗不影響後續調用，僅記錄警告。
+        """
+        if self._warm:
+            return
+        with self._warm_lock:
+            if self._warm:
+                return
+            try:
+                response = self.session.post(
+                    self.ollama_url,
+                    json={"model": self.model_name, "keep_alive": self.keep_alive},
+                    timeout=180
+                )
+                response.raise_for_status()
+            except Exception as e:
+                self.logger.warning(f"模型預熱失敗: {e}")
+            self._warm = True
+    
+    def _call_ollama(self, prompt: str, temperature: float = 0.2,
+                     num_predict: int = 2048, json_mode: bool = False) -> Optional[str]:
+        """
+        調用 Ollama API（先查詢提示詞快取），調用失敗時回傳 None
+        
+        Args:
+            prompt: 提示詞
+            temperature: 生成溫度
+            num_predict: 最多生成的 token 數
+            json_mode: 是否要求 Ollama 以 JSON 格式約束輸出
+        """
+        # 生成參數不同時回應也不同，一併納入快取鍵
+        variant = f"{self.model_name}|{num_predict}|{'json' if json_mode else 'text'}"
+        key = make_prompt_key(variant, temperature, prompt)
+        namespace = f"{variant}|{temperature}"
+        cached, vector = self.llm_cache.lookup(key, prompt, namespace)
+        if cached is not None:
+            return cached
+        
+        cached = self.prompt_cache.get(key)
+        if cached is not None:
+            self.llm_cache.store(key, cached, namespace, vector)
+            return cached
+        
+        self._warm_up()
         try:
             payload = {
                 "model": self.model_name,
                 "prompt": prompt,
                 "stream": False,
+                "keep_alive": self.keep_alive,
                 "options": {
                     "temperature": temperature,
                     "top_p": 0.9,
-                    "num_predict": 2048
+                    "num_predict": num_predict
                 }
             }
+            if json_mode:
+                payload["format"] = "json"
             
-            response = requests.post(self.ollama_url, json=payload, timeout=180)
+            with self._request_slots:
+                response = self.session.post(self.ollama_url, json=payload, timeout=180)
             response.raise_for_status()
             
             result = response.json()
-            return str(result.get("response", "")).strip()
+            content = str(result.get("response", "")).strip()
             
         except Exception as e:
             self.logger.error(f"Ollama API 調用失敗: {e}")
-            return ""
+            return None
+        
+        if content:
+            self.llm_cache.store(key, content, namespace, vector)
+            self.prompt_cache.set(key, content)
+        return content
+    
+    def _call_ollama_many(self, prompts: List[str], temperature: float = 0.2,
+                          num_predict: int = 2048, json_mode: bool = False) -> List[Optional[str]]:
+        """
+        並行調用 Ollama API，回應順序與 prompts 一致
+        
+        各提示詞彼此獨立，以最多 num_parallel 個執行緒同時送出，
+        讓網路往返與模型運算重疊。相同的提示詞（例如重複的分段內容）
+        只送出一次，結果再分配回各自的位置。
+        """
+        unique_prompts = list(dict.fromkeys(prompts))
+        
+        if len(unique_prompts) <= 1 or self.num_parallel == 1:
+            responses = [
+                self._call_ollama(prompt, temperature, num_predict, json_mode) for prompt in unique_prompts
+            ]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.num_parallel, len(unique_prompts))) as executor:
+                responses = list(executor.map(
+                    lambda prompt: self._call_ollama(prompt, temperature, num_predict, json_mode),
+                    unique_prompts
+                ))
+        
+        if len(unique_prompts) == len(prompts):
+            return responses
+        response_by_prompt = dict(zip(unique_prompts, responses))
+        return [response_by_prompt[prompt] for prompt in prompts]
     
     def evaluate_segment_boundaries(self, segments: List[Dict]) -> Dict[str, float]:
         """
@@ -88,55 +277,91 @@ class SegmentQualityEvaluator:
         Returns:
             邊界品質評估結果
         """
-        boundary_scores = []
+        # 先一次取出各分段的結尾與開頭，迴圈內只做索引
+        texts = [segment["segment_text"] for segment in segments]
+        tails = [text[-200:] for text in texts]
+        heads = [text[:200] for text in texts]
         
-        for i in range(len(segments) - 1):
-            current_segment = segments[i]["segment_text"]
-            next_segment = segments[i + 1]["segment_text"]
-            
-            # 檢查分段邊界是否自然
-            evaluation_prompt = f"""
-請評估以下兩個相鄰文本段落的分段邊界是否合理：
-
+        # 兩側分段的分析分數皆達良好且段落A以句末標點結尾時，視為乾淨邊界，
+        # 直接給分而不調用模型
+        good = self.quality_thresholds["good"]
+        well_scored = [
+            segment.get("analysis", {}).get("overall_score", 0) >= good for segment in segments
+        ]
+        boundary_count = len(segments) - 1
+        boundary_scores = [7.0] * boundary_count
+        
+        # 每個邊界以 (編號, 段落A結尾, 段落B開頭) 表示，編號自 1 起算
+        boundaries = []
+        for i in range(boundary_count):
+            tail = tails[i].rstrip()
+            if well_scored[i] and well_scored[i + 1] and tail and tail[-1] in self._SENTENCE_END:
+                boundary_scores[i] = 9.0
+            else:
+                boundaries.append((i + 1, tails[i], heads[i + 1]))
+        
+        # 多個邊界合併為一個提示詞，分攤指令前綴與 HTTP 往返成本
+        batch_size = self.boundary_batch_size
+        batches = [boundaries[j:j + batch_size] for j in range(0, len(boundaries), batch_size)]
+        prompts = []
+        for batch in batches:
+            pairs = "".join(f"""
+### 邊界 {boundary_id}
 段落A結尾：
-...{current_segment[-200:]}
+...{tail}
 
 段落B開頭：
-{next_segment[:200]}...
-
-請從以下角度評分（0-10分）：
-1. 語意切分是否自然
-2. 是否在句子中間切斷
-3. 主題轉換是否合理
-4. 資訊是否有遺漏或重複
-
-請以JSON格式回答：
-{{
-    "boundary_score": 分數,
-    "is_natural_break": true/false,
-    "issues": ["問題描述"],
-    "suggestions": ["改進建議"]
-}}
-"""
-            
-            response = self._call_ollama(evaluation_prompt)
+{head}...
+""" for boundary_id, tail, head in batch)
             
+            prompts.append(f"""
+請評估以下 {len(batch)} 組相鄰文本段落的分段邊界是否合理：
+{pairs}{_BOUNDARY_PROMPT_INSTRUCTIONS}""")
+        
+        responses = self._call_ollama_many(
+            prompts, num_predict=self._NUM_PREDICT["boundary"], json_mode=True
+        )
+        for batch, response in zip(batches, responses):
+            # 調用失敗或空回應時直接沿用預設分數，不做解析
+            if not response:
+                continue
             try:
-                json_match = re.search(r'\{.*\}', response, re.DOTALL)
-                if json_match:
-                    result = json.loads(json_match.group())
-                    boundary_scores.append(result.get("boundary_score", 7.0))
-                else:
-                    boundary_scores.append(7.0)
-            except:
-                boundary_scores.append(7.0)
+                result = extract_json(response)
+                items = result.get("scores", []) if result is not None else []
+            except AttributeError as e:
+                self.logger.warning(f"分段邊界評估結果格式錯誤: {e}")
+                continue
+            if not isinstance(items, list):
+                self.logger.warning(f"分段邊界評估結果格式錯誤: scores 不是列表 ({type(items).__name__})")
+                continue
+            
+            # 逐項解析，單一項目格式錯誤只略過該項，不影響同批其他邊界
+            batch_ids = {boundary_id for boundary_id, _, _ in batch}
+            for item in items:
+                if not isinstance(item, dict):
+                    continue
+                raw_id = item.get("id")
+                if isinstance(raw_id, bool) or (isinstance(raw_id, float) and not raw_id.is_integer()):
+                    continue
+                try:
+                    boundary_id = int(raw_id)
+                except (TypeError, ValueError, OverflowError):
+                    continue
+                if boundary_id not in batch_ids:
+                    continue
+                # 分數可能是字串或 null，無法轉為數值時沿用預設分數
+                try:
+                    score = float(item.get("boundary_score", 7.0))
+                except (TypeError, ValueError):
+                    score = 7.0
+                boundary_scores[boundary_id - 1] = score if math.isfinite(score) else 7.0
         
         if boundary_scores:
             return {
                 "average_boundary_score": statistics.mean(boundary_scores),
                 "min_boundary_score": min(boundary_scores),
                 "boundary_count": len(boundary_scores),
-                "poor_boundaries": len([s for s in boundary_scores if s < 5.0])
+                "poor_boundaries": sum(1 for s in boundary_scores if s < 5.0)
             }
         else:
             return {
@@ -157,16 +382,27 @@ class SegmentQualityEvaluator:
         Returns:
             內容覆蓋評估結果
         """
-        # 重組分段文本
-        reconstructed_text = ""
+        # 重組文本為各段落後接換行；提示詞只用到其開頭與結尾，不必串接出完整文本
+        pieces = []
         for segment in segments:
-            reconstructed_text += segment["segment_text"] + "\n"
+            pieces.append(segment["segment_text"])
+            pieces.append("\n")
+        reconstructed_head, reconstructed_tail, reconstructed_length = self._concat_excerpts(pieces, 500)
         
         # 計算基本統計
         original_length = len(original_text)
-        reconstructed_length = len(reconstructed_text)
         coverage_ratio = reconstructed_length / original_length if original_length > 0 else 0
         
+        # 分段皆切自原文，長度與頭、中、尾取樣都與原文吻合時可直接判定完整，不調用模型
+        if self._coverage_matches_original(original_text, [segment["segment_text"] for segment in segments]):
+            return {
+                "length_coverage_ratio": coverage_ratio,
+                "content_completeness": 9.5,
+                "information_loss": 0.5,
+                "redundancy_level": 0.5,
+                "overall_coverage": 9.5
+            }
+        
         # 使用AI評估內容完整性
         coverage_prompt = f"""
 請比較原始文本和重組文本的內容完整性：
@@ -181,10 +417,10 @@ class SegmentQualityEvaluator:
 ...{original_text[-500:]}
 
 重組文本開頭：
-{reconstructed_text[:500]}...
+{reconstructed_head}...
 
 重組文本結尾：
-...{reconstructed_text[-500:]}
+...{reconstructed_tail}
 
 請評估：
 1. 重要資訊是否遺漏
@@ -200,16 +436,11 @@ class SegmentQualityEvaluator:
 }}
 """
         
-        response = self._call_ollama(coverage_prompt)
+        response = self._call_ollama(
+            coverage_prompt, num_predict=self._NUM_PREDICT["coverage"], json_mode=True
+        )
         
-        try:
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                ai_result = json.loads(json_match.group())
-            else:
-                ai_result = {}
-        except:
-            ai_result = {}
+        ai_result = (extract_json(response) if response else None) or {}
         
         return {
             "length_coverage_ratio": coverage_ratio,
@@ -219,6 +450,78 @@ class SegmentQualityEvaluator:
             "overall_coverage": ai_result.get("overall_coverage", 8.0)
         }
     
+    def _coverage_matches_original(self, original_text: str, texts: List[str],
+                                   window: int = 500, min_ratio: float = 0.95) -> bool:
+        """
+        以字元層級比對快速判斷分段是否完整覆蓋原文
+        
+        分段總長度需在原文的 98%–102% 之間，且原文與分段串接結果的
+        開頭、中段、結尾取樣視窗相似度皆高於 min_ratio。
+        """
+        original_length = len(original_text)
+        if original_length == 0:
+            return False
+        
+        head, tail, total_length = self._concat_excerpts(texts, window)
+        if not 0.98 <= total_length / original_length <= 1.02:
+            return False
+        
+        original_mid = max(0, original_length // 2 - window // 2)
+        recon_mid = max(0, total_length // 2 - window // 2)
+        samples = (
+            (original_text[:window], head),
+            (original_text[original_mid:original_mid + window], self._excerpt_at(texts, recon_mid, window)),
+            (original_text[-window:], tail)
+        )
+        for original_sample, recon_sample in samples:
+            matcher = SequenceMatcher(None, original_sample, recon_sample, autojunk=False)
+            # quick_ratio 為 ratio 的上界，先以其排除明顯不符的情況
+            if matcher.quick_ratio() < min_ratio or matcher.ratio() < min_ratio:
+                return False
+        return True
+    
+    @staticmethod
+    def _excerpt_at(pieces: List[str], start: int, limit: int) -> str:
+        """取得 "".join(pieces)[start:start + limit]，不建立完整的串接字串"""
+        excerpt: List[str] = []
+        remaining = limit
+        for piece in pieces:
+            if remaining <= 0:
+                break
+            if start >= len(piece):
+                start -= len(piece)
+                continue
+            chunk = piece[start:start + remaining]
+            excerpt.append(chunk)
+            remaining -= len(chunk)
+            start = 0
+        return "".join(excerpt)
+    
+    @staticmethod
+    def _concat_excerpts(pieces: List[str], limit: int) -> Tuple[str, str, int]:
+        """
+        取得 "".join(pieces) 的開頭與結尾各 limit 個字元及總長度
+        
+        只走訪頭尾所需的片段，不建立完整的串接字串。
+        """
+        head: List[str] = []
+        remaining = limit
+        for piece in pieces:
+            if remaining <= 0:
+                break
+            head.append(piece[:remaining])
+            remaining -= len(piece)
+        
+        tail: List[str] = []
+        remaining = limit
+        for piece in reversed(pieces):
+            if remaining <= 0:
+                break
+            tail.append(piece[-remaining:])
+            remaining -= len(piece)
+        
+        return "".join(head), "".join(reversed(tail)), sum(len(piece) for piece in pieces)
+    
     def evaluate_segment_balance(self, segments: List[Dict]) -> Dict[str, float]:
         """
         評估分段長度平衡性
@@ -229,14 +532,17 @@ class SegmentQualityEvaluator:
         Returns:
             長度平衡評估結果
         """
-        lengths = [seg["metadata"]["length"] for seg in segments]
-        
-        if not lengths:
+        if not segments:
             return {"balance_score": 0.0}
         
-        avg_length = statistics.mean(lengths)
-        length_variance = statistics.variance(lengths) if len(lengths) > 1 else 0
-        length_std = statistics.stdev(lengths) if len(lengths) > 1 else 0
+        lengths = np.fromiter(
+            (seg["metadata"]["length"] for seg in segments), dtype=np.int64, count=len(segments)
+        )
+        
+        avg_length = float(lengths.mean())
+        length_std = float(lengths.std(ddof=1)) if len(lengths) > 1 else 0
+        min_length = int(lengths.min())
+        max_length = int(lengths.max())
         
         # 計算變異係數
         cv = length_std / avg_length if avg_length > 0 else 0
@@ -249,9 +555,9 @@ class SegmentQualityEvaluator:
             "length_std": length_std,
             "coefficient_of_variation": cv,
             "balance_score": balance_score,
-            "min_length": min(lengths),
-            "max_length": max(lengths),
-            "length_range": max(lengths) - min(lengths)
+            "min_length": min_length,
+            "max_length": max_length,
+            "length_range": max_length - min_length
         }
     
     def detect_quality_issues(self, segments: List[Dict]) -> List[Dict]:
@@ -265,59 +571,95 @@ class SegmentQualityEvaluator:
             問題列表
         """
         issues = []
+        if not segments:
+            return issues
+        
+        acceptable = self.quality_thresholds["acceptable"]
+        poor = self.quality_thresholds["poor"]
+        
+        # 先將各分段的指標轉為平行的 numpy 陣列，以向量化比較找出有問題的分段，
+        # 只對這些分段建立問題紀錄（大多數分段不會產生任何問題）
+        n = len(segments)
+        has_analysis = np.fromiter((bool(seg.get("analysis")) for seg in segments), dtype=bool, count=n)
+        semantic = np.fromiter(
+            (seg.get("analysis", {}).get("semantic_completeness", 5.0) if has else 5.0
+             for seg, has in zip(segments, has_analysis)),
+            dtype=np.float64, count=n
+        )
+        topic = np.fromiter(
+            (seg.get("analysis", {}).get("topic_consistency", 5.0) if has else 5.0
+             for seg, has in zip(segments, has_analysis)),
+            dtype=np.float64, count=n
+        )
+        length = np.fromiter(
+            (seg.get("metadata", {}).get("length", 100) for seg in segments),
+            dtype=np.int64, count=n
+        )
+        texts = [seg.get("segment_text", "") for seg in segments]
+        lead_punct, trail_punct = self._LEAD_PUNCT, self._TRAIL_PUNCT
+        bad_punct = np.fromiter(
+            (bool(text) and (text[0] in lead_punct or text[-1] in trail_punct)
+             for text in texts),
+            dtype=bool, count=n
+        )
         
-        for i, segment in enumerate(segments):
+        mask_sem_poor = semantic < acceptable
+        mask_short = length < 100
+        mask_long = length > 6000
+        mask_topic_poor = topic < acceptable
+        
+        # 如果沒有分析數據，跳過品質檢查
+        flagged = has_analysis & (mask_sem_poor | mask_short | mask_long | mask_topic_poor | bad_punct)
+        
+        for i in np.flatnonzero(flagged).tolist():
+            segment = segments[i]
             segment_id = segment.get("segment_id", i + 1)
-            analysis = segment.get("analysis", {})
-            metadata = segment.get("metadata", {})
-            text = segment.get("segment_text", "")
-            
-            # 如果沒有分析數據，跳過品質檢查
-            if not analysis:
-                continue
+            analysis = segment["analysis"]
             
             # 檢查語意完整性
-            semantic_score = analysis.get("semantic_completeness", 5.0)
-            if semantic_score < self.quality_thresholds["acceptable"]:
+            if mask_sem_poor[i]:
+                semantic_score = analysis.get("semantic_completeness", 5.0)
                 issues.append({
                     "segment_id": segment_id,
                     "issue_type": "語意不完整",
-                    "severity": "high" if semantic_score < self.quality_thresholds["poor"] else "medium",
+                    "severity": "high" if semantic_score < poor else "medium",
                     "score": semantic_score,
                     "description": "段落語意不夠完整，可能在關鍵位置切斷"
                 })
             
             # 檢查長度異常
-            if metadata["length"] < 100:
-                issues.append({
-                    "segment_id": segment_id,
-                    "issue_type": "段落過短",
-                    "severity": "medium",
-                    "score": metadata["length"],
-                    "description": f"段落長度僅 {metadata['length']} 字元，可能包含資訊不足"
-                })
-            elif metadata["length"] > 6000:
-                issues.append({
-                    "segment_id": segment_id,
-                    "issue_type": "段落過長",
-                    "severity": "medium",
-                    "score": metadata["length"],
-                    "description": f"段落長度達 {metadata['length']} 字元，可能需要進一步分段"
-                })
+            if mask_short[i] or mask_long[i]:
+                segment_length = segment["metadata"]["length"]
+                if mask_short[i]:
+                    issues.append({
+                        "segment_id": segment_id,
+                        "issue_type": "段落過短",
+                        "severity": "medium",
+                        "score": segment_length,
+                        "description": f"段落長度僅 {segment_length} 字元，可能包含資訊不足"
+                    })
+                else:
+                    issues.append({
+                        "segment_id": segment_id,
+                        "issue_type": "段落過長",
+                        "severity": "medium",
+                        "score": segment_length,
+                        "description": f"段落長度達 {segment_length} 字元，可能需要進一步分段"
+                    })
             
             # 檢查主題一致性
-            topic_score = analysis.get("topic_consistency", 5.0)
-            if topic_score < self.quality_thresholds["acceptable"]:
+            if mask_topic_poor[i]:
+                topic_score = analysis.get("topic_consistency", 5.0)
                 issues.append({
                     "segment_id": segment_id,
                     "issue_type": "主題不一致",
-                    "severity": "medium" if topic_score < self.quality_thresholds["poor"] else "low",
+                    "severity": "medium" if topic_score < poor else "low",
                     "score": topic_score,
                     "description": "段落內容主題跳躍，缺乏一致性"
                 })
             
             # 檢查開頭結尾
-            if text.startswith(("，", "。", "、", "；", "：")) or text.endswith(("，", "、", "；", "：")):
+            if bad_punct[i]:
                 issues.append({
                     "segment_id": segment_id,
                     "issue_type": "分段邊界問題",
@@ -351,16 +693,15 @@ class SegmentQualityEvaluator:
                 issues_by_segment[seg_id] = []
             issues_by_segment[seg_id].append(issue)
         
-        # 為每個有問題的段落生成建議
+        # 為每個有問題的段落準備提示詞
+        # 以 segment_id 建立索引（反向建立，編號重複時與線性搜尋同樣取第一個）
+        segment_by_id = {s["segment_id"]: s for s in reversed(segments)}
+        pending = []
         for seg_id, seg_issues in issues_by_segment.items():
-            segment = next((s for s in segments if s["segment_id"] == seg_id), None)
+            segment = segment_by_id.get(seg_id)
             if not segment:
                 continue
             
-            # 分析問題類型
-            issue_types = [issue["issue_type"] for issue in seg_issues]
-            high_severity_count = len([i for i in seg_issues if i["severity"] == "high"])
-            
             suggestion_prompt = f"""
 段落 {seg_id} 存在以下品質問題：
 {[f"{issue['issue_type']}: {issue['description']}" for issue in seg_issues]}
@@ -378,36 +719,49 @@ class SegmentQualityEvaluator:
     "expected_improvement": "預期改善效果"
 }}
 """
+            pending.append((seg_id, seg_issues, suggestion_prompt))
+        
+        responses = self._call_ollama_many(
+            [prompt for _, _, prompt in pending],
+            num_predict=self._NUM_PREDICT["suggestion"],
+            json_mode=True
+        )
+        
+        for (seg_id, seg_issues, _), response in zip(pending, responses):
+            # 調用失敗時直接給予默認建議
+            if not response:
+                suggestions.append(self._default_suggestion(seg_id, seg_issues))
+                continue
             
-            response = self._call_ollama(suggestion_prompt)
-            
-            try:
-                json_match = re.search(r'\{.*\}', response, re.DOTALL)
-                if json_match:
-                    ai_suggestion = json.loads(json_match.group())
-                    
-                    suggestions.append({
-                        "segment_id": seg_id,
-                        "issues": seg_issues,
-                        "priority": ai_suggestion.get("priority", "medium"),
-                        "action_type": ai_suggestion.get("action_type", "內容整理"),
-                        "suggestions": ai_suggestion.get("specific_suggestions", []),
-                        "expected_improvement": ai_suggestion.get("expected_improvement", "提升品質")
-                    })
-            except:
-                # 默認建議
-                priority = "high" if high_severity_count > 0 else "medium"
+            ai_suggestion = extract_json(response)
+            if isinstance(ai_suggestion, dict):
                 suggestions.append({
                     "segment_id": seg_id,
                     "issues": seg_issues,
-                    "priority": priority,
-                    "action_type": "重新檢查",
-                    "suggestions": ["重新評估分段邊界", "檢查語意完整性"],
-                    "expected_improvement": "改善分段品質"
+                    "priority": ai_suggestion.get("priority", "medium"),
+                    "action_type": ai_suggestion.get("action_type", "內容整理"),
+                    "suggestions": ai_suggestion.get("specific_suggestions", []),
+                    "expected_improvement": ai_suggestion.get("expected_improvement", "提升品質")
                 })
+            else:
+                suggestions.append(self._default_suggestion(seg_id, seg_issues))
         
         return suggestions
     
+    @staticmethod
+    def _default_suggestion(seg_id: int, seg_issues: List[Dict]) -> Dict[str, Any]:
+        """無法取得 AI 建議時使用的默認建議"""
+        # 分析問題類型
+        has_high_severity = any(i["severity"] == "high" for i in seg_issues)
+        return {
+            "segment_id": seg_id,
+            "issues": seg_issues,
+            "priority": "high" if has_high_severity else "medium",
+            "action_type": "重新檢查",
+            "suggestions": ["重新評估分段邊界", "檢查語意完整性"],
+            "expected_improvement": "改善分段品質"
+        }
+    
     def evaluate_segments(self, 
                          segments: List[Dict], 
                          original_text: Optional[str] = None) -> Dict:
@@ -437,39 +791,54 @@ class SegmentQualityEvaluator:
                 segment_scores.append(segment["analysis"]["overall_score"])
         
         if segment_scores:
+            scores = np.asarray(segment_scores, dtype=np.float64)
+            average_score = float(scores.mean())
+            acceptable_count = int((scores >= self.quality_thresholds["acceptable"]).sum())
             evaluation_results["individual_quality"] = {
-                "average_score": statistics.mean(segment_scores),
-                "min_score": min(segment_scores),
-                "max_score": max(segment_scores),
-                "std_score": statistics.stdev(segment_scores) if len(segment_scores) > 1 else 0,
-                "excellent_count": len([s for s in segment_scores if s >= self.quality_thresholds["excellent"]]),
-                "good_count": len([s for s in segment_scores if s >= self.quality_thresholds["good"]]),
-                "acceptable_count": len([s for s in segment_scores if s >= self.quality_thresholds["acceptable"]]),
-                "poor_count": len([s for s in segment_scores if s < self.quality_thresholds["acceptable"]])
+                "average_score": average_score,
+                "min_score": float(scores.min()),
+                "max_score": float(scores.max()),
+                "std_score": float(scores.std(ddof=1)) if len(scores) > 1 else 0,
+                "excellent_count": int((scores >= self.quality_thresholds["excellent"]).sum()),
+                "good_count": int((scores >= self.quality_thresholds["good"]).sum()),
+                "acceptable_count": acceptable_count,
+                "poor_count": len(scores) - acceptable_count
             }
         
-        # 2. 分段邊界評估
-        evaluation_results["boundary_quality"] = self.evaluate_segment_boundaries(segments)
-        
-        # 3. 長度平衡評估
-        evaluation_results["balance_quality"] = self.evaluate_segment_balance(segments)
+        # 問題檢測只需本地計算，先完成以便改進建議與其他 LLM 階段同時進行
+        issues = self.detect_quality_issues(segments)
         
-        # 4. 內容覆蓋評估（如果有原文）
-        if original_text:
-            evaluation_results["coverage_quality"] = self.evaluate_content_coverage(original_text, segments)
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            boundary_future = executor.submit(self.evaluate_segment_boundaries, segments)
+            coverage_future = (
+                executor.submit(self.evaluate_content_coverage, original_text, segments)
+                if original_text else None
+            )
+            suggestions_future = executor.submit(self.generate_improvement_suggestions, segments, issues)
+            
+            # 2. 分段邊界評估
+            evaluation_results["boundary_quality"] = boundary_future.result()
+            
+            # 3. 長度平衡評估
+            evaluation_results["balance_quality"] = self.evaluate_segment_balance(segments)
+            
+            # 4. 內容覆蓋評估（如果有原文）
+            if coverage_future is not None:
+                evaluation_results["coverage_quality"] = coverage_future.result()
+            
+            suggestions = suggestions_future.result()
         
         # 5. 問題檢測
-        issues = self.detect_quality_issues(segments)
         evaluation_results["issues"] = issues
+        severity_counts = Counter(issue["severity"] for issue in issues)
         evaluation_results["issue_summary"] = {
             "total_issues": len(issues),
-            "high_severity": len([i for i in issues if i["severity"] == "high"]),
-            "medium_severity": len([i for i in issues if i["severity"] == "medium"]),
-            "low_severity": len([i for i in issues if i["severity"] == "low"])
+            "high_severity": severity_counts["high"],
+            "medium_severity": severity_counts["medium"],
+            "low_severity": severity_counts["low"]
         }
         
         # 6. 改進建議
-        suggestions = self.generate_improvement_suggestions(segments, issues)
         evaluation_results["improvement_suggestions"] = suggestions
         
         # 7. 綜合品質評分
@@ -477,7 +846,7 @@ class SegmentQualityEvaluator:
         weights = {}
         
         if segment_scores:
-            quality_components.append(statistics.mean(segment_scores))
+            quality_components.append(average_score)
             weights["individual"] = 0.4
         
         boundary_score = evaluation_results["boundary_quality"]["average_boundary_score"]
@@ -543,8 +912,7 @@ class SegmentQualityEvaluator:
         filename = f"quality_evaluation_{timestamp}.json"
         filepath = os.path.join(output_dir, filename)
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(evaluation_results, f, ensure_ascii=False, indent=2)
+        write_json(filepath, evaluation_results)
             
         self.logger.info(f"評估報告已保存至: {filepath}")
         return filepath
@@ -563,11 +931,12 @@ class SegmentQualityEvaluator:
         coherence_scores = []
         problematic_segments = []
         
-        for i, segment in enumerate(segments):
+        prompts = []
+        for segment in segments:
             segment_text = segment.get("segment_text", "")
             
             # 語意連貫性檢查提示詞
-            coherence_prompt = f"""請判斷下列段落是否語意連貫且無明顯斷裂，回覆'是'或'否'並簡述原因。
+            prompts.append(f"""請判斷下列段落是否語意連貫且無明顯斷裂，回覆'是'或'否'並簡述原因。
 
 評估標準：
 1. 段落開頭是否自然，沒有突然開始
@@ -590,16 +959,20 @@ class SegmentQualityEvaluator:
     "natural_start": true/false,
     "complete_ending": true/false,
     "topic_completeness": 0-10分
-}}"""
-            
+}}""")
+        
+        responses = self._call_ollama_many(
+            prompts, num_predict=self._NUM_PREDICT["coherence"], json_mode=True
+        )
+        for i, response in enumerate(responses):
+            # 調用失敗時視同評估失敗，不做解析
+            if not response:
+                coherence_scores.append(5.0)
+                continue
             try:
-                response = self._call_ollama(coherence_prompt)
-                
                 # 解析 JSON 回應
-                json_match = re.search(r'\{.*\}', response, re.DOTALL)
-                if json_match:
-                    result = json.loads(json_match.group())
-                    
+                result = extract_json(response)
+                if result is not None:
                     coherence_score = result.get("coherence_score", 5.0)
                     coherence_scores.append(coherence_score)
                     
@@ -626,7 +999,7 @@ class SegmentQualityEvaluator:
         if coherence_scores:
             avg_coherence = statistics.mean(coherence_scores)
             min_coherence = min(coherence_scores)
-            poor_segments_count = len([s for s in coherence_scores if s < 6.0])
+            poor_segments_count = sum(1 for s in coherence_scores if s < 6.0)
             
             return {
                 "average_coherence": avg_coherence,
@@ -658,11 +1031,14 @@ class SegmentQualityEvaluator:
         """
         self.logger.info(f"開始批次品質檢查，共 {len(segments)} 個分段")
         
-        # 執行各項評估
-        boundary_eval = self.evaluate_segment_boundaries(segments)
-        balance_eval = self.evaluate_segment_balance(segments)
-        coherence_eval = self.evaluate_semantic_coherence(segments)
-        quality_issues = self.detect_quality_issues(segments)
+        # 執行各項評估（邊界與連貫性兩個 LLM 階段同時進行）
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            boundary_future = executor.submit(self.evaluate_segment_boundaries, segments)
+            coherence_future = executor.submit(self.evaluate_semantic_coherence, segments)
+            balance_eval = self.evaluate_segment_balance(segments)
+            quality_issues = self.detect_quality_issues(segments)
+            boundary_eval = boundary_future.result()
+            coherence_eval = coherence_future.result()
         
         # 生成綜合報告
         report: Dict[str, Any] = {
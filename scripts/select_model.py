@@ -1,8 +1,37 @@
 import subprocess
 import sys
 import argparse
+import json
+import time
+from pathlib import Path
 
-def list_models():
+# ollama list 結果的快取檔與有效秒數，避免每次選模型都重新執行子行程
+MODELS_CACHE_PATH = Path.home() / ".cache" / "exam08" / "ollama_models.json"
+MODELS_CACHE_TTL = 60
+
+def _load_cached_models():
+    try:
+        if time.time() - MODELS_CACHE_PATH.stat().st_mtime < MODELS_CACHE_TTL:
+            models = json.loads(MODELS_CACHE_PATH.read_text(encoding="utf-8"))
+            if isinstance(models, list) and models:
+                return models
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _save_cached_models(models):
+    try:
+        MODELS_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        MODELS_CACHE_PATH.write_text(json.dumps(models, ensure_ascii=False), encoding="utf-8")
+    except OSError:
+        pass
+
+def list_models(use_cache=True):
+    if use_cache:
+        models = _load_cached_models()
+        if models is not None:
+            return models
+    
     try:
         result = subprocess.run(
             ["ollama", "list"],
@@ -27,6 +56,10 @@ def list_models():
         # 取第一欄為模型名稱
         name = line.split()[0]
         models.append(name)
+    
+    # 只快取非空結果，剛下載模型後不會被舊的空清單擋住
+    if models:
+        _save_cached_models(models)
     return models
 
 def select_model(interactive=True, default_model=None):
@@ -6,20 +6,93 @@
 """
 
 import os
-import json
+import asyncio
 import logging
+import re
+import textwrap
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 from datetime import datetime
 import requests
+from requests.adapters import HTTPAdapter
 
 try:
     from .semantic_splitter import SemanticSplitter
     from .segment_quality_eval import SegmentQualityEvaluator
+    from .llm_utils import (
+        SegmentResponseCache, make_prompt_key, read_ollama_stream, read_text_file, write_bytes_atomic, write_json
+    )
 except ImportError:
     # 當作為腳本直接執行時的回退導入
     from semantic_splitter import SemanticSplitter
     from segment_quality_eval import SegmentQualityEvaluator
+    from llm_utils import (
+        SegmentResponseCache, make_prompt_key, read_ollama_stream, read_text_file, write_bytes_atomic, write_json
+    )
+
+
+# 各實例共用的日誌格式
+_LOG_FORMATTER = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+
+def _compact_prompt(text: str) -> str:
+    """移除提示詞的共同縮排與行尾空白，減少送出的位元組與提示詞 token 數"""
+    return re.sub(r'[ \t]+\n', '\n', textwrap.dedent(text))
+
+
+# 整合會議記錄提示詞中片段列表前後的固定內容
+_MERGE_PROMPT_HEAD = """
+請將以下多個會議記錄片段整合成一份完整、連貫的會議記錄：
+
+"""
+
+_MERGE_PROMPT_TAIL = """
+
+請生成一份結構化的完整會議記錄，包含：
+
+# 會議記錄
+
+## 會議基本資訊
+- 會議時間：
+- 主持人：
+- 參與人員：
+
+## 會議議程與討論
+
+### 第一項議題：
+#### 討論內容
+#### 決議事項
+#### 行動項目
+
+### 第二項議題：
+#### 討論內容
+#### 決議事項
+#### 行動項目
+
+## 重要決議彙整
+1. 
+2. 
+
+## 後續行動項目
+| 項目 | 負責人 | 期限 | 狀態 |
+|------|--------|------|------|
+|      |        |      |      |
+
+## 下次會議安排
+- 時間：
+- 議題：
+
+請確保：
+1. 消除重複內容
+2. 保持邏輯連貫性
+3. 突出重要決議和行動項目
+4. 使用專業的會議記錄格式
+"""
+
+_MERGE_PROMPT_HEAD = _compact_prompt(_MERGE_PROMPT_HEAD).lstrip()
+_MERGE_PROMPT_TAIL = _compact_prompt(_MERGE_PROMPT_TAIL).rstrip()
 
 
 class SemanticMeetingProcessor:
@@ -31,7 +104,12 @@ class SemanticMeetingProcessor:
                  ollama_url: str = "http://localhost:11434/api/generate",
                  max_segment_length: int = 4000,
                  overlap_length: int = 200,
-                 quality_threshold: float = 6.0):
+                 quality_threshold: float = 6.0,
+                 num_parallel: Optional[int] = None,
+                 cache: bool = True,
+                 cache_path: Optional[str] = None,
+                 cache_ttl: Optional[int] = 7 * 24 * 3600,
+                 near_duplicate_threshold: Optional[float] = None):
         """
         初始化處理器
         
@@ -42,23 +120,52 @@ class SemanticMeetingProcessor:
             max_segment_length: 最大分段長度
             overlap_length: 段落重疊長度
             quality_threshold: 品質閾值
+            num_parallel: 同時生成的段落會議記錄數（與分段、品質評估管線重疊）；Ollama 伺服器端需設定
+                OLLAMA_NUM_PARALLEL 才會真正並行處理，未指定時讀取同名環境變數，預設 4
+            cache: 是否快取段落分析與會議記錄片段，重跑相同逐字稿時直接重用
+            cache_path: 持久化快取的 sqlite 路徑，預設置於 ~/.cache/exam08
+            cache_ttl: 持久化快取有效秒數，None 表示永不過期
+            near_duplicate_threshold: 內容近似重複（MinHash 估計 Jaccard 相似度）
+                達此門檻的段落直接重用結果；None 表示只做精確比對
         """
         self.splitter_model = splitter_model
         self.generator_model = generator_model
         self.ollama_url = ollama_url
         self.quality_threshold = quality_threshold
+        if num_parallel is None:
+            num_parallel = int(os.environ.get("OLLAMA_NUM_PARALLEL", 4))
+        self.num_parallel = max(1, num_parallel)
+        # 多個文件並行處理時共用，限制同時送出的生成請求數不超過 num_parallel
+        self._request_slots = threading.BoundedSemaphore(self.num_parallel)
+
+        # 共用連線池，保持 keep-alive 以避免每次請求重新建立 TCP 連線
+        self.session = requests.Session()
+        self.session.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip, deflate"})
+        self.session.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=0))
+        
+        self.response_cache = SegmentResponseCache(
+            path=cache_path,
+            ttl_seconds=cache_ttl,
+            enabled=cache,
+            near_duplicate_threshold=near_duplicate_threshold
+        )
         
-        # 初始化組件
+        # 初始化組件（分段器與處理器共用同一份段落回應快取；處理器本身不保存
+        # 任何單次處理的狀態，批次處理時可由多個執行緒同時調用 process_transcript）
         self.splitter = SemanticSplitter(
             model_name=splitter_model,
             ollama_url=ollama_url,
             max_segment_length=max_segment_length,
-            overlap_length=overlap_length
+            overlap_length=overlap_length,
+            response_cache=self.response_cache
         )
         
         self.quality_evaluator = SegmentQualityEvaluator(
             model_name=splitter_model,
-            ollama_url=ollama_url
+            ollama_url=ollama_url,
+            prompt_cache=cache,
+            prompt_cache_path=cache_path,
+            prompt_cache_ttl=cache_ttl
         )
         
         self.logger = self._setup_logger()
@@ -97,41 +204,63 @@ class SemanticMeetingProcessor:
 3. 組織清晰，條理分明
 4. 使用專業的會議記錄語言
 """
+        self.meeting_prompt_template = _compact_prompt(self.meeting_prompt_template).strip()
+        
+        # 模板固定不變，預先切成段落前後兩部分，生成時直接串接
+        self._prompt_head, self._prompt_tail = self.meeting_prompt_template.split("{transcript_segment}")
     
     def _setup_logger(self) -> logging.Logger:
         """設置日誌記錄器"""
         logger = logging.getLogger("SemanticMeetingProcessor")
         logger.setLevel(logging.INFO)
         
+        # 同名記錄器只掛一次處理器，重複建立實例時直接沿用
         if not logger.handlers:
             handler = logging.StreamHandler()
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
+            handler.setFormatter(_LOG_FORMATTER)
             logger.addHandler(handler)
             
         return logger
     
-    def _call_ollama(self, prompt: str, model: str, temperature: float = 0.3) -> str:
-        """調用 Ollama API"""
+    def close(self) -> None:
+        """釋放處理器與分段器的連線池與快取"""
+        self.session.close()
+        self.response_cache.close()
+        self.splitter.close()
+    
+    def __enter__(self) -> "SemanticMeetingProcessor":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def _call_ollama(self, prompt: str, model: str, temperature: float = 0.3, num_predict: int = 4096) -> str:
+        """
+        調用 Ollama API
+        
+        Args:
+            prompt: 提示詞
+            model: 使用的模型
+            temperature: 生成溫度
+            num_predict: 最多生成的 token 數，依預期回應長度設定可減少伺服器預留的 KV 快取
+        """
         try:
             payload = {
                 "model": model,
                 "prompt": prompt,
-                "stream": False,
+                "stream": True,
                 "options": {
                     "temperature": temperature,
                     "top_p": 0.9,
-                    "num_predict": 4096
+                    "num_predict": num_predict
                 }
             }
             
-            response = requests.post(self.ollama_url, json=payload, timeout=300)
-            response.raise_for_status()
-            
-            result = response.json()
-            return result.get("response", "").strip()
+            # 以串流接收，生成與傳輸重疊，不必等伺服器緩衝完整輸出
+            with self._request_slots, \
+                    self.session.post(self.ollama_url, json=payload, timeout=300, stream=True) as response:
+                response.raise_for_status()
+                return read_ollama_stream(response).strip()
             
         except Exception as e:
             self.logger.error(f"Ollama API 調用失敗 (模型: {model}): {e}")
@@ -147,12 +276,22 @@ class SemanticMeetingProcessor:
         Returns:
             生成的會議記錄片段
         """
-        prompt = self.meeting_prompt_template.format(transcript_segment=segment_text)
+        prompt = "".join((self._prompt_head, segment_text, self._prompt_tail))
         
         self.logger.info(f"正在生成會議記錄片段，文本長度: {len(segment_text)} 字元")
         
-        # 使用會議記錄生成模型
-        meeting_record = self._call_ollama(prompt, self.generator_model, temperature=0.2)
+        # 使用會議記錄生成模型（相同或近似重複的段落直接重用快取結果）
+        key = make_prompt_key(self.generator_model, 0.2, prompt)
+        namespace = f"{self.generator_model}|meeting_record"
+        meeting_record, signature = self.response_cache.get(key, segment_text, namespace)
+        if meeting_record is None:
+            # 會議記錄長度大致隨段落長度增減
+            meeting_record = self._call_ollama(
+                prompt, self.generator_model, temperature=0.2,
+                num_predict=min(4096, max(1024, len(segment_text)))
+            )
+            if meeting_record:
+                self.response_cache.set(key, segment_text, meeting_record, namespace, signature)
         
         if not meeting_record:
             self.logger.warning("會議記錄生成失敗，使用備用格式")
@@ -168,6 +307,17 @@ class SemanticMeetingProcessor:
         
         return meeting_record
     
+    def _build_segment_record(self, segment: Dict) -> Dict:
+        """為單個分段生成會議記錄並組成段落記錄"""
+        self.logger.info(f"處理段落 {segment['segment_id']}")
+        return {
+            "segment_id": segment["segment_id"],
+            "original_text": segment["segment_text"],
+            "meeting_record": self._generate_segment_meeting_record(segment["segment_text"]),
+            "metadata": segment["metadata"],
+            "analysis": segment.get("analysis", {})
+        }
+    
     def _merge_meeting_records(self, segment_records: List[Dict]) -> str:
         """
         整合所有段落的會議記錄
@@ -178,51 +328,14 @@ class SemanticMeetingProcessor:
         Returns:
             完整的會議記錄
         """
-        merge_prompt = f"""
-請將以下多個會議記錄片段整合成一份完整、連貫的會議記錄：
-
-{chr(10).join([f"=== 片段 {record['segment_id']} ==={chr(10)}{record['meeting_record']}{chr(10)}" for record in segment_records])}
-
-請生成一份結構化的完整會議記錄，包含：
-
-# 會議記錄
-
-## 會議基本資訊
-- 會議時間：
-- 主持人：
-- 參與人員：
-
-## 會議議程與討論
-
-### 第一項議題：
-#### 討論內容
-#### 決議事項
-#### 行動項目
-
-### 第二項議題：
-#### 討論內容
-#### 決議事項
-#### 行動項目
-
-## 重要決議彙整
-1. 
-2. 
-
-## 後續行動項目
-| 項目 | 負責人 | 期限 | 狀態 |
-|------|--------|------|------|
-|      |        |      |      |
-
-## 下次會議安排
-- 時間：
-- 議題：
-
-請確保：
-1. 消除重複內容
-2. 保持邏輯連貫性
-3. 突出重要決議和行動項目
-4. 使用專業的會議記錄格式
-"""
+        merge_prompt = "".join((
+            _MERGE_PROMPT_HEAD,
+            "\n".join(
+                f"=== 片段 {record['segment_id']} ===\n{record['meeting_record']}\n"
+                for record in segment_records
+            ),
+            _MERGE_PROMPT_TAIL
+        ))
         
         self.logger.info("正在整合所有會議記錄片段")
         
@@ -238,6 +351,24 @@ class SemanticMeetingProcessor:
         
         return final_record
     
+    @staticmethod
+    def _make_process_dir(output_dir: str, timestamp: str) -> str:
+        """
+        建立本次處理的輸出目錄
+        
+        批次並行處理時多個文件可能在同一秒開始，目錄已存在時加上序號避免互相覆寫。
+        """
+        base_dir = os.path.join(output_dir, f"semantic_process_{timestamp}")
+        process_dir = base_dir
+        suffix = 1
+        while True:
+            try:
+                os.makedirs(process_dir)
+                return process_dir
+            except FileExistsError:
+                suffix += 1
+                process_dir = f"{base_dir}_{suffix}"
+    
     def process_transcript(self, 
                           transcript_text: str, 
                           output_dir: str = "output",
@@ -262,8 +393,7 @@ class SemanticMeetingProcessor:
         
         # 創建輸出目錄
         os.makedirs(output_dir, exist_ok=True)
-        process_dir = os.path.join(output_dir, f"semantic_process_{timestamp}")
-        os.makedirs(process_dir, exist_ok=True)
+        process_dir = self._make_process_dir(output_dir, timestamp)
         
         result = {
             "timestamp": timestamp,
@@ -272,10 +402,19 @@ class SemanticMeetingProcessor:
             "processing_steps": []
         }
         
+        # 分段、品質評估與會議記錄生成以管線方式重疊：每個段落一產出就送交
+        # 執行緒池生成會議記錄（同時進行的請求數不超過 num_parallel），
+        # 品質評估也在生成進行中執行
+        executor = ThreadPoolExecutor(max_workers=self.num_parallel)
+        record_futures = []
         try:
             # 步驟1: 語意分段
             self.logger.info("步驟1: 執行語意分段")
-            segments = self.splitter.split_text(transcript_text, enable_ai_optimization=True)
+            segments = []
+            for segment in self.splitter.iter_segments(transcript_text, enable_ai_optimization=True):
+                segments.append(segment)
+                record_futures.append(executor.submit(self._build_segment_record, segment))
+            self.logger.info(f"語意分段完成，共 {len(segments)} 個段落")
             
             # 保存分段結果
             segments_path = self.splitter.save_segments(segments, process_dir)
@@ -326,27 +465,11 @@ class SemanticMeetingProcessor:
             
             # 步驟3: 生成會議記錄片段
             self.logger.info("步驟3: 生成會議記錄片段")
-            segment_records = []
-            
-            for i, segment in enumerate(segments):
-                self.logger.info(f"處理段落 {segment['segment_id']}/{len(segments)}")
-                
-                meeting_record = self._generate_segment_meeting_record(segment["segment_text"])
-                
-                segment_record = {
-                    "segment_id": segment["segment_id"],
-                    "original_text": segment["segment_text"],
-                    "meeting_record": meeting_record,
-                    "metadata": segment["metadata"],
-                    "analysis": segment.get("analysis", {})
-                }
-                
-                segment_records.append(segment_record)
+            segment_records = [future.result() for future in record_futures]
             
             # 保存段落會議記錄
             segments_records_path = os.path.join(process_dir, "segment_meeting_records.json")
-            with open(segments_records_path, 'w', encoding='utf-8') as f:
-                json.dump(segment_records, f, ensure_ascii=False, indent=2)
+            write_json(segments_records_path, segment_records)
             
             result["segment_records_file"] = segments_records_path
             result["processing_steps"].append({
@@ -363,8 +486,7 @@ class SemanticMeetingProcessor:
             
             # 保存最終會議記錄
             final_record_path = os.path.join(process_dir, "final_meeting_record.md")
-            with open(final_record_path, 'w', encoding='utf-8') as f:
-                f.write(final_meeting_record)
+            write_bytes_atomic(final_record_path, final_meeting_record.encode('utf-8'))
             
             result["final_record_file"] = final_record_path
             result["final_record_length"] = len(final_meeting_record)
@@ -385,8 +507,7 @@ class SemanticMeetingProcessor:
             
             # 保存處理結果摘要
             summary_path = os.path.join(process_dir, "process_summary.json")
-            with open(summary_path, 'w', encoding='utf-8') as f:
-                json.dump(result, f, ensure_ascii=False, indent=2)
+            write_json(summary_path, result)
             
             result["summary_file"] = summary_path
             
@@ -395,13 +516,19 @@ class SemanticMeetingProcessor:
             result["status"] = "error"
             result["error"] = str(e)
             result["processing_time"] = time.time() - start_time
+        finally:
+            # 出錯時取消尚未開始的生成工作，再等待執行中的工作結束
+            for future in record_futures:
+                future.cancel()
+            executor.shutdown(wait=True)
         
         return result
     
     def batch_process_files(self, 
                            input_dir: str, 
                            output_dir: str = "output",
-                           file_pattern: str = "*.txt") -> List[Dict]:
+                           file_pattern: str = "*.txt",
+                           file_concurrency: Optional[int] = None) -> List[Dict]:
         """
         批次處理多個逐字稿文件
         
@@ -409,6 +536,8 @@ class SemanticMeetingProcessor:
             input_dir: 輸入目錄
             output_dir: 輸出目錄
             file_pattern: 文件匹配模式
+            file_concurrency: 同時處理的文件數，未指定時讀取環境變數
+                EXAM08_FILE_CONCURRENCY，預設 3
             
         Returns:
             批次處理結果列表
@@ -416,33 +545,13 @@ class SemanticMeetingProcessor:
         import glob
         
         files = glob.glob(os.path.join(input_dir, file_pattern))
-        results = []
         
         self.logger.info(f"發現 {len(files)} 個文件待處理")
         
-        for i, file_path in enumerate(files):
-            self.logger.info(f"處理文件 {i+1}/{len(files)}: {os.path.basename(file_path)}")
-            
-            try:
-                # 讀取文件
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                # 處理文件
-                result = self.process_transcript(content, output_dir)
-                result["source_file"] = file_path
-                result["file_index"] = i + 1
-                
-                results.append(result)
-                
-            except Exception as e:
-                self.logger.error(f"處理文件 {file_path} 時發生錯誤: {e}")
-                results.append({
-                    "source_file": file_path,
-                    "file_index": i + 1,
-                    "status": "error",
-                    "error": str(e)
-                })
+        if file_concurrency is None:
+            file_concurrency = int(os.environ.get("EXAM08_FILE_CONCURRENCY", 3))
+        
+        results = asyncio.run(self._process_files_async(files, output_dir, max(1, file_concurrency))) if files else []
         
         # 保存批次處理報告
         batch_timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -456,12 +565,43 @@ class SemanticMeetingProcessor:
             "results": results
         }
         
-        with open(batch_report_path, 'w', encoding='utf-8') as f:
-            json.dump(batch_summary, f, ensure_ascii=False, indent=2)
+        write_json(batch_report_path, batch_summary)
         
         self.logger.info(f"批次處理完成，報告保存至: {batch_report_path}")
         return results
-
+    
+    async def _process_files_async(self, files: List[str], output_dir: str, max_concurrency: int) -> List[Dict]:
+        """
+        並行處理多個逐字稿文件
+        
+        以 Semaphore 限制同時處理的文件數，每個文件在取得名額後才讀入並於執行緒中
+        執行 process_transcript，記憶體用量只與同時處理的文件數相關。回傳順序與 files 一致。
+        """
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def _process(i: int, file_path: str) -> Dict:
+            async with semaphore:
+                self.logger.info(f"處理文件 {i+1}/{len(files)}: {os.path.basename(file_path)}")
+                
+                try:
+                    # 讀取並處理文件
+                    content = await loop.run_in_executor(None, read_text_file, file_path)
+                    result = await loop.run_in_executor(None, self.process_transcript, content, output_dir)
+                    result["source_file"] = file_path
+                    result["file_index"] = i + 1
+                    return result
+                    
+                except Exception as e:
+                    self.logger.error(f"處理文件 {file_path} 時發生錯誤: {e}")
+                    return {
+                        "source_file": file_path,
+                        "file_index": i + 1,
+                        "status": "error",
+                        "error": str(e)
+                    }
+        
+        return await asyncio.gather(*(_process(i, file_path) for i, file_path in enumerate(files)))
 
 def main():
     """測試語意分段會議記錄處理器"""
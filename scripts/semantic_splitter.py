@@ -6,12 +6,57 @@
 """
 
 import os
-import json
 import logging
 import re
-from typing import List, Dict, Tuple, Optional, Union, Any
+from collections import Counter
+from typing import List, Dict, Tuple, Optional, Union, Any, Iterator
 from datetime import datetime
+import numpy as np
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from .llm_utils import SegmentResponseCache, extract_json, make_prompt_key, read_ollama_stream, write_json
+except ImportError:
+    # 當作為腳本直接執行時的回退導入
+    from llm_utils import SegmentResponseCache, extract_json, make_prompt_key, read_ollama_stream, write_json
+
+# 段落開頭不應出現的標點與句末標點
+_LEAD_PUNCT = frozenset("，。、；：！？")
+_SENTENCE_END = frozenset("。！？!?」』）)")
+
+# 各實例共用的日誌格式
+_LOG_FORMATTER = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+# 優先級分段點
+_BREAKPOINT_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'\n\n',  # 雙換行（段落分隔）
+    r'。\s*\n',  # 句號後換行
+    r'。\s+',  # 句號後空格
+    r'！\s*\n',  # 驚嘆號後換行
+    r'？\s*\n',  # 問號後換行
+    r'，\s*\n',  # 逗號後換行
+))
+
+# 分段點類別：除 _BREAKPOINT_PATTERNS 的索引外，文本結尾與未找到自然分段點另以常數表示
+_BREAK_AT_TEXT_END = -1
+_BREAK_FORCED = len(_BREAKPOINT_PATTERNS)
+# 落在段落分隔或句末換行上的分段點
+_HARD_BREAKS = frozenset({_BREAK_AT_TEXT_END, 0, 1, 3, 4})
+
+def _strip_bounds(text: str, start: int, end: int) -> Tuple[int, int]:
+    """
+    回傳 text[start:end].strip() 在 text 中的 (開始, 結束) 位置
+
+    只檢查範圍兩端的空白字元，不建立中間子字串。
+    """
+    start = max(0, start)
+    end = min(end, len(text))
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
 
 class SemanticSplitter:
     """語意分段器 - 使用 Gemma3 模型進行智能分段"""
@@ -20,7 +65,14 @@ class SemanticSplitter:
                  model_name: str = "gemma3:12b",
                  ollama_url: str = "http://localhost:11434/api/generate",
                  max_segment_length: int = 4000,
-                 overlap_length: int = 200):
+                 overlap_length: int = 200,
+                 boundary_batch_size: int = 8,
+                 local_coherence: bool = False,
+                 cache: bool = True,
+                 cache_path: Optional[str] = None,
+                 cache_ttl: Optional[int] = 7 * 24 * 3600,
+                 near_duplicate_threshold: Optional[float] = None,
+                 response_cache: Optional[SegmentResponseCache] = None):
         """
         初始化語意分段器
         
@@ -29,11 +81,33 @@ class SemanticSplitter:
             ollama_url: Ollama API 端點
             max_segment_length: 每段最大字元數
             overlap_length: 段落重疊字元數
+            boundary_batch_size: AI 邊界優化時合併於同一提示詞的分段數
+            local_coherence: 是否以本地規則估計取代模型分析（邊界標點正常的段落不調用模型）；
+                規則分數未經模型分數校準，預設關閉
+            cache: 是否快取段落分析結果，重跑相同逐字稿時直接重用
+            cache_path: 持久化快取的 sqlite 路徑，預設置於 ~/.cache/exam08
+            cache_ttl: 持久化快取有效秒數，None 表示永不過期
+            near_duplicate_threshold: 內容近似重複（MinHash 估計 Jaccard 相似度）
+                達此門檻的段落直接重用分析結果；None 表示只做精確比對
+            response_cache: 與其他元件共用的段落回應快取；提供時忽略上述快取參數
         """
         self.model_name = model_name
         self.ollama_url = ollama_url
         self.max_segment_length = max_segment_length
         self.overlap_length = overlap_length
+        self.boundary_batch_size = max(1, boundary_batch_size)
+        self.local_coherence = local_coherence
+        self.response_cache = response_cache or SegmentResponseCache(
+            path=cache_path,
+            ttl_seconds=cache_ttl,
+            enabled=cache,
+            near_duplicate_threshold=near_duplicate_threshold
+        )
+
+        # 共用連線池，保持 keep-alive 以避免每次請求重新建立 TCP 連線
+        self.session = requests.Session()
+        self.session.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip, deflate"})
+        self.session.mount("http://", HTTPAdapter(pool_connections=16, pool_maxsize=16, max_retries=0))
         self.logger = self._setup_logger()
         
     def _setup_logger(self) -> logging.Logger:
@@ -41,41 +115,79 @@ class SemanticSplitter:
         logger = logging.getLogger(f"SemanticSplitter_{self.model_name}")
         logger.setLevel(logging.INFO)
         
+        # 同名記錄器只掛一次處理器，重複建立實例時直接沿用
         if not logger.handlers:
             handler = logging.StreamHandler()
-            formatter = logging.Formatter(
-                '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-            )
-            handler.setFormatter(formatter)
+            handler.setFormatter(_LOG_FORMATTER)
             logger.addHandler(handler)
             
         return logger
     
-    def _call_ollama(self, prompt: str, temperature: float = 0.3) -> str:
-        """調用 Ollama API"""
+    def close(self) -> None:
+        """釋放連線池與快取"""
+        self.session.close()
+        self.response_cache.close()
+    
+    def __enter__(self) -> "SemanticSplitter":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+    
+    def _call_ollama(self, prompt: str, temperature: float = 0.3, num_predict: int = 4096) -> str:
+        """
+        調用 Ollama API
+        
+        Args:
+            prompt: 提示詞
+            temperature: 生成溫度
+            num_predict: 最多生成的 token 數，依預期回應長度設定可減少伺服器預留的 KV 快取
+        """
         try:
             payload = {
                 "model": self.model_name,
                 "prompt": prompt,
-                "stream": False,
+                "stream": True,
                 "options": {
                     "temperature": temperature,
                     "top_p": 0.9,
-                    "num_predict": 4096
+                    "num_predict": num_predict
                 }
             }
             
-            response = requests.post(self.ollama_url, json=payload, timeout=300)
-            response.raise_for_status()
-            
-            result = response.json()
-            return str(result.get("response", "")).strip()
+            # 以串流接收，生成與傳輸重疊，不必等伺服器緩衝完整輸出
+            with self.session.post(self.ollama_url, json=payload, timeout=300, stream=True) as response:
+                response.raise_for_status()
+                return read_ollama_stream(response).strip()
             
         except Exception as e:
             self.logger.error(f"Ollama API 調用失敗: {e}")
             return ""
     
-    def _find_natural_breakpoints(self, text: str, target_length: int) -> List[int]:
+    def _call_ollama_cached(self, prompt: str, segment: str, kind: str,
+                            temperature: float = 0.3, num_predict: int = 4096) -> str:
+        """
+        先查詢段落回應快取再調用 Ollama API
+        
+        Args:
+            prompt: 提示詞
+            segment: 提示詞所針對的段落內容，供近似重複比對
+            kind: 提示詞種類，近似比對只在同種類內進行
+            temperature: 生成溫度
+            num_predict: 最多生成的 token 數
+        """
+        key = make_prompt_key(self.model_name, temperature, prompt)
+        namespace = f"{self.model_name}|{kind}"
+        cached, signature = self.response_cache.get(key, segment, namespace)
+        if cached is not None:
+            return cached
+        
+        response = self._call_ollama(prompt, temperature, num_predict)
+        if response:
+            self.response_cache.set(key, segment, response, namespace, signature)
+        return response
+    
+    def _find_natural_breakpoints(self, text: str, target_length: int) -> List[Tuple[int, int]]:
         """
         尋找自然分段點（段落、句號、換行等）
         
@@ -84,60 +196,104 @@ class SemanticSplitter:
             target_length: 目標分段長度
             
         Returns:
-            分段點位置列表
+            (分段點位置, 分段點類別) 列表；類別為 _BREAKPOINT_PATTERNS 的索引，
+            文本結尾為 _BREAK_AT_TEXT_END，未找到自然分段點時為 _BREAK_FORCED
         """
         breakpoints = []
         
-        # 優先級分段點
-        patterns = [
-            r'\n\n',  # 雙換行（段落分隔）
-            r'。\s*\n',  # 句號後換行
-            r'。\s+',  # 句號後空格
-            r'！\s*\n',  # 驚嘆號後換行
-            r'？\s*\n',  # 問號後換行
-            r'，\s*\n',  # 逗號後換行
-        ]
-        
         current_pos = 0
         while current_pos < len(text):
             # 計算目標分段結束位置
             end_pos = min(current_pos + target_length, len(text))
             
             if end_pos >= len(text):
-                breakpoints.append(len(text))
+                breakpoints.append((len(text), _BREAK_AT_TEXT_END))
                 break
                 
-            # 在目標範圍內尋找最佳分段點
+            # 在目標範圍內尋找最佳分段點（以 pos/endpos 限定搜尋範圍，不切出子字串）
             best_breakpoint = end_pos
+            best_rank = _BREAK_FORCED
             search_start = max(current_pos + target_length - 500, current_pos)
-            search_text = text[search_start:end_pos + 200]
+            search_end = min(end_pos + 200, len(text))
             
-            for pattern in patterns:
-                matches = list(re.finditer(pattern, search_text))
-                if matches:
-                    # 選擇最接近目標長度的分段點
-                    for match in reversed(matches):
-                        absolute_pos = search_start + match.end()
-                        if absolute_pos > current_pos + 500:  # 最小分段長度
-                            best_breakpoint = absolute_pos
-                            break
+            for rank, pattern in enumerate(_BREAKPOINT_PATTERNS):
+                last_match = None
+                for last_match in pattern.finditer(text, search_start, search_end):
+                    pass
+                if last_match is not None:
+                    # 選擇最接近目標長度的分段點；匹配位置遞增，最後一個不足最小長度時其餘亦然
+                    if last_match.end() > current_pos + 500:  # 最小分段長度
+                        best_breakpoint = last_match.end()
+                        best_rank = rank
                     break
             
-            breakpoints.append(best_breakpoint)
+            breakpoints.append((best_breakpoint, best_rank))
             current_pos = best_breakpoint
             
         return breakpoints
     
+    def _local_coherence_score(self, segment: str) -> Optional[Dict[str, Union[float, List[str]]]]:
+        """
+        以本地規則快速估計段落語意品質
+        
+        - 語意完整性：開頭不是標點、結尾為句末標點
+        - 主題一致性：段落前後半部字元頻率向量的餘弦相似度
+        - 資訊完整性：段落長度相對於最大分段長度
+        
+        依上述規則，總分必定落在約 6.0–8.4 之間，實際上只由邊界標點決定是否
+        交由 LLM 分析；分數僅為粗估，因此只在明確啟用 local_coherence 時使用。
+        
+        Returns:
+            估計結果；邊界標點有問題時回傳 None，交由 LLM 分析
+        """
+        if not segment or segment[0] in _LEAD_PUNCT or segment[-1] not in _SENTENCE_END:
+            return None
+        
+        half = len(segment) // 2
+        first = Counter(ch for ch in segment[:half] if not ch.isspace())
+        second = Counter(ch for ch in segment[half:] if not ch.isspace())
+        vocabulary = list(first.keys() | second.keys())
+        if not vocabulary:
+            return None
+        a = np.fromiter((first[ch] for ch in vocabulary), dtype=np.float64, count=len(vocabulary))
+        b = np.fromiter((second[ch] for ch in vocabulary), dtype=np.float64, count=len(vocabulary))
+        norm = float(np.linalg.norm(a) * np.linalg.norm(b))
+        similarity = float(a @ b) / norm if norm else 0.0
+        
+        semantic_completeness = 8.0
+        topic_consistency = round(min(9.5, 4.0 + 5.0 * similarity), 1)
+        logical_coherence = round((semantic_completeness + topic_consistency) / 2, 1)
+        information_completeness = 8.0 if len(segment) >= self.max_segment_length * 0.25 else 6.0
+        overall_score = round((semantic_completeness + topic_consistency
+                               + logical_coherence + information_completeness) / 4, 1)
+        
+        return {
+            "semantic_completeness": semantic_completeness,
+            "topic_consistency": topic_consistency,
+            "logical_coherence": logical_coherence,
+            "information_completeness": information_completeness,
+            "overall_score": overall_score,
+            "issues": [],
+            "suggestions": []
+        }
+    
     def _analyze_segment_coherence(self, segment: str) -> Dict[str, Union[float, List[str]]]:
         """
         使用 Gemma3 分析段落語意完整性
         
+        明確啟用 local_coherence 時，邊界標點正常的段落直接採用本地估計，不調用模型。
+        
         Args:
             segment: 要分析的文本段落
             
         Returns:
             語意分析結果字典
         """
+        if self.local_coherence:
+            local_result = self._local_coherence_score(segment)
+            if local_result is not None:
+                return local_result
+        
         analysis_prompt = f"""
 請分析以下文本段落的語意完整性和內容品質：
 
@@ -162,16 +318,16 @@ class SemanticSplitter:
 }}
 """
         
-        response = self._call_ollama(analysis_prompt, temperature=0.2)
+        response = self._call_ollama_cached(
+            analysis_prompt, segment, "coherence", temperature=0.2, num_predict=512
+        )
         
-        try:
-            # 提取JSON部分
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                result: Dict[str, Union[float, List[str]]] = json.loads(json_match.group())
+        # 提取JSON部分
+        if response:
+            result: Optional[Dict[str, Union[float, List[str]]]] = extract_json(response)
+            if result is not None:
                 return result
-        except Exception as e:
-            self.logger.warning(f"語意分析結果解析失敗: {e}")
+            self.logger.warning("語意分析結果解析失敗: 回應中沒有合法的 JSON 物件")
             
         # 默認評分
         return {
@@ -184,89 +340,129 @@ class SemanticSplitter:
             "suggestions": []
         }
     
-    def _optimize_segment_boundary(self, 
-                                   text: str, 
-                                   start_pos: int, 
-                                   end_pos: int) -> Tuple[int, int]:
+    def _optimize_boundaries_batch(self,
+                                   text: str,
+                                   ranges: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
         """
-        使用 Gemma3 優化分段邊界
+        使用 Gemma3 批次優化多個分段的邊界
+        
+        每個分段只提供開始與結束位置前後各 200 字元的上下文，
+        每 boundary_batch_size 個分段合併為一個提示詞，減少 LLM 往返次數。
         
         Args:
             text: 完整文本
-            start_pos: 初始開始位置
-            end_pos: 初始結束位置
+            ranges: 初始 (開始位置, 結束位置) 列表
             
         Returns:
-            優化後的 (開始位置, 結束位置)
+            優化後的 (開始位置, 結束位置) 列表，順序與 ranges 一致
         """
-        # 擴展分析範圍
-        context_start = max(0, start_pos - 200)
-        context_end = min(len(text), end_pos + 200)
-        context = text[context_start:context_end]
+        optimized = list(ranges)
+        batch_size = self.boundary_batch_size
         
-        optimization_prompt = f"""
-請幫助優化文本分段的邊界位置，確保語意完整性。
-
-文本內容：
-{context}
-
-當前分段範圍：
-- 開始位置（相對於上述文本）: {start_pos - context_start}
-- 結束位置（相對於上述文本）: {end_pos - context_start}
+        for batch_start in range(0, len(ranges), batch_size):
+            batch = range(batch_start, min(batch_start + batch_size, len(ranges)))
+            
+            # 每個分段的 (開始處上下文起點, 結束處上下文起點)
+            context_starts = {}
+            blocks = []
+            for i in batch:
+                start_pos, end_pos = ranges[i]
+                start_ctx = max(0, start_pos - 200)
+                end_ctx = max(0, end_pos - 200)
+                context_starts[i] = (start_ctx, end_ctx)
+                blocks.append(f"""
+### 分段 {i}
+開始處上下文：
+{text[start_ctx:start_pos + 200]}
+當前開始位置（相對於開始處上下文）: {start_pos - start_ctx}
 
+結束處上下文：
+{text[end_ctx:end_pos + 200]}
+當前結束位置（相對於結束處上下文）: {end_pos - end_ctx}
+""")
+            
+            optimization_prompt = f"""
+請幫助優化以下 {len(blocks)} 個文本分段的邊界位置，確保語意完整性。
+{"".join(blocks)}
 請分析並建議更好的分段邊界，確保：
 1. 段落在語意上完整
 2. 避免在句子中間切斷
 3. 保持主題的完整性
 
-請以JSON格式回答：
+請以JSON格式回答，boundaries 中每個分段一筆，i 為上方的分段編號，
+start 為相對於開始處上下文的位置，end 為相對於結束處上下文的位置：
 {{
-    "optimized_start": 相對開始位置,
-    "optimized_end": 相對結束位置,
-    "reason": "優化原因",
-    "confidence": 信心度0-1
+    "boundaries": [
+        {{"i": 分段編號, "start": 相對開始位置, "end": 相對結束位置, "confidence": 信心度0-1}}
+    ]
 }}
 """
-        
-        response = self._call_ollama(optimization_prompt, temperature=0.1)
-        
-        try:
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                
-                new_start = context_start + result.get("optimized_start", start_pos - context_start)
-                new_end = context_start + result.get("optimized_end", end_pos - context_start)
-                
-                # 邊界檢查
-                new_start = max(0, min(new_start, len(text)))
-                new_end = max(new_start + 100, min(new_end, len(text)))
-                
-                if result.get("confidence", 0) > 0.7:
-                    return new_start, new_end
-                    
-        except Exception as e:
-            self.logger.warning(f"邊界優化失敗: {e}")
             
-        return start_pos, end_pos
+            # 每個分段的回應約數十個 token
+            response = self._call_ollama(
+                optimization_prompt, temperature=0.1, num_predict=128 + 64 * len(blocks)
+            )
+            result = extract_json(response) if response else None
+            if result is None:
+                continue
+            
+            for item in result.get("boundaries", []):
+                try:
+                    i = item["i"]
+                    if i not in context_starts or item.get("confidence", 0) <= 0.7:
+                        continue
+                    start_pos, end_pos = ranges[i]
+                    start_ctx, end_ctx = context_starts[i]
+                    new_start = start_ctx + int(item.get("start", start_pos - start_ctx))
+                    new_end = end_ctx + int(item.get("end", end_pos - end_ctx))
+                    
+                    # 邊界檢查
+                    new_start = max(0, min(new_start, len(text)))
+                    new_end = max(new_start + 100, min(new_end, len(text)))
+                    optimized[i] = (new_start, new_end)
+                except (KeyError, TypeError, ValueError) as e:
+                    self.logger.warning(f"邊界優化失敗: {e}")
+        
+        return optimized
     
-    def split_text(self, text: str, enable_ai_optimization: bool = True) -> List[Dict]:
+    def split_text(self, text: str, enable_ai_optimization: bool = True, analyze: bool = True) -> List[Dict]:
         """
         執行語意分段
         
         Args:
             text: 要分段的完整文本
             enable_ai_optimization: 是否啟用AI邊界優化
+            analyze: 是否分析各段落的語意品質；不需要時 analysis 為空字典，省去分析調用
             
         Returns:
             分段結果列表，每個元素包含 segment_text, analysis, metadata
         """
+        segments = list(self.iter_segments(text, enable_ai_optimization, analyze))
+        self.logger.info(f"語意分段完成，共 {len(segments)} 個段落")
+        return segments
+    
+    def iter_segments(self, text: str, enable_ai_optimization: bool = True,
+                      analyze: bool = True) -> Iterator[Dict]:
+        """
+        逐一產生分段結果
+        
+        每個段落完成語意分析後立即產出，呼叫端可在分段尚未全部完成時
+        就開始處理已產出的段落。
+        
+        Args:
+            text: 要分段的完整文本
+            enable_ai_optimization: 是否啟用AI邊界優化
+            analyze: 是否分析各段落的語意品質
+            
+        Yields:
+            分段結果，包含 segment_text, analysis, metadata
+        """
         self.logger.info(f"開始語意分段，文本長度: {len(text)} 字元")
         
         if len(text) <= self.max_segment_length:
             # 文本太短，不需要分段
-            analysis = self._analyze_segment_coherence(text)
-            return [{
+            analysis = self._analyze_segment_coherence(text) if analyze else {}
+            yield {
                 "segment_id": 1,
                 "segment_text": text,
                 "analysis": analysis,
@@ -276,36 +472,53 @@ class SemanticSplitter:
                     "length": len(text),
                     "is_optimized": False
                 }
-            }]
+            }
+            return
         
         # 初步分段
         breakpoints = self._find_natural_breakpoints(text, self.max_segment_length)
         self.logger.info(f"找到 {len(breakpoints)} 個初步分段點")
         
-        segments: List[Dict[str, Any]] = []
-        for i, end_pos in enumerate(breakpoints):
-            start_pos = 0 if i == 0 else breakpoints[i-1] - self.overlap_length
-            start_pos = max(0, start_pos)
-            
-            # AI邊界優化
-            if enable_ai_optimization and i > 0:
-                original_start, original_end = start_pos, end_pos
-                start_pos, end_pos = self._optimize_segment_boundary(text, start_pos, end_pos)
-                is_optimized = (start_pos != original_start or end_pos != original_end)
-            else:
-                is_optimized = False
-            
-            # 提取分段文本
-            segment_text = text[start_pos:end_pos].strip()
+        ranges = [
+            (0 if i == 0 else max(0, breakpoints[i-1][0] - self.overlap_length), end_pos)
+            for i, (end_pos, _) in enumerate(breakpoints)
+        ]
+        
+        # AI邊界優化（第一段開頭固定為 0，不需優化）；前後分段點都落在換行或
+        # 段落分隔上、且長度（不含重疊，最後一段除外）與目標相差不超過 20% 的分段，
+        # 模型幾乎不會調整，直接跳過
+        optimized_ranges = list(ranges)
+        if enable_ai_optimization:
+            tolerance = self.max_segment_length * 0.2
+            candidates = [
+                i for i in range(1, len(ranges))
+                if not (breakpoints[i-1][1] in _HARD_BREAKS
+                        and breakpoints[i][1] in _HARD_BREAKS
+                        and (breakpoints[i][1] == _BREAK_AT_TEXT_END
+                             or abs(breakpoints[i][0] - breakpoints[i-1][0] - self.max_segment_length)
+                             <= tolerance))
+            ]
+            if candidates:
+                self.logger.info(f"{len(candidates)}/{len(ranges) - 1} 個分段需要 AI 邊界優化")
+                optimized = self._optimize_boundaries_batch(text, [ranges[i] for i in candidates])
+                for i, optimized_range in zip(candidates, optimized):
+                    optimized_ranges[i] = optimized_range
+        
+        segment_count = 0
+        for (original_start, original_end), (start_pos, end_pos) in zip(ranges, optimized_ranges):
+            is_optimized = (start_pos != original_start or end_pos != original_end)
             
-            if not segment_text:
+            # 提取分段文本：先在原文上定位去除空白後的範圍，只切出一次子字串
+            text_start, text_end = _strip_bounds(text, start_pos, end_pos)
+            if text_start >= text_end:
                 continue
+            segment_text = text[text_start:text_end]
                 
             # 分析語意品質
-            analysis = self._analyze_segment_coherence(segment_text)
+            analysis = self._analyze_segment_coherence(segment_text) if analyze else {}
             
             segment_info: Dict[str, Any] = {
-                "segment_id": len(segments) + 1,
+                "segment_id": segment_count + 1,
                 "segment_text": segment_text,
                 "analysis": analysis,
                 "metadata": {
@@ -316,7 +529,7 @@ class SemanticSplitter:
                 }
             }
             
-            segments.append(segment_info)
+            segment_count += 1
             
             # 安全提取品質分數
             overall_score = analysis.get('overall_score', 0)
@@ -327,9 +540,8 @@ class SemanticSplitter:
                 f"長度={segment_info['metadata']['length']}, "
                 f"品質={quality_score:.1f}/10"
             )
-        
-        self.logger.info(f"語意分段完成，共 {len(segments)} 個段落")
-        return segments
+            
+            yield segment_info
     
     def save_segments(self, segments: List[Dict], output_dir: str) -> str:
         """
@@ -360,8 +572,7 @@ class SemanticSplitter:
             "segments": segments
         }
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(save_data, f, ensure_ascii=False, indent=2)
+        write_json(filepath, save_data)
             
         self.logger.info(f"分段結果已保存至: {filepath}")
         return filepath
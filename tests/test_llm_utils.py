@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+llm_utils 單元測試
+涵蓋快取過期、精確與近似比對、JSON 擷取與原子寫入，不需連線 Ollama
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from scripts import llm_utils  # noqa: E402
+from scripts.llm_utils import (  # noqa: E402
+    MinHashIndex, PromptCache, SegmentResponseCache, SemanticCache,
+    extract_json, make_prompt_key, write_bytes_atomic, write_json
+)
+
+_TRANSCRIPT = (
+    "主席：今天會議主要討論下年度預算分配，請各單位說明需求。"
+    "財務組：人事費用預估成長百分之五，設備採購維持去年水準。"
+    "決議：預算案原則通過，細節於下次會議確認。"
+)
+
+
+class TestExtractJson:
+    def test_plain_object(self):
+        assert extract_json('{"score": 8}') == {"score": 8}
+
+    def test_fenced_block(self):
+        text = '以下是評估結果：\n```json\n{"score": 8, "issues": []}\n```\n'
+        assert extract_json(text) == {"score": 8, "issues": []}
+
+    def test_trailing_garbage(self):
+        text = '{"score": 7, "note": "ok"} 以上為分析，另外 {不是 JSON'
+        assert extract_json(text) == {"score": 7, "note": "ok"}
+
+    def test_skips_invalid_leading_brace(self):
+        assert extract_json('{broken {"id": 1}') == {"id": 1}
+
+    def test_no_object(self):
+        assert extract_json("模型沒有回傳 JSON") is None
+        assert extract_json("{not json}") is None
+
+
+class TestPromptCache:
+    def test_roundtrip_and_stats(self, tmp_path):
+        cache = PromptCache(path=tmp_path / "cache.sqlite3")
+        key = make_prompt_key("gemma3:12b", 0.1, "prompt")
+        assert cache.get(key) is None
+        cache.set(key, "response")
+        assert cache.get(key) == "response"
+        assert cache.stats == {"hits": 1, "misses": 1}
+        cache.close()
+
+    def test_ttl_expiry(self, tmp_path, monkeypatch):
+        now = [1_000_000.0]
+        monkeypatch.setattr(llm_utils.time, "time", lambda: now[0])
+        cache = PromptCache(path=tmp_path / "cache.sqlite3", ttl_seconds=60)
+        cache.set("key", "response")
+
+        now[0] += 60
+        assert cache.get("key") == "response"
+        now[0] += 1
+        assert cache.get("key") is None
+        cache.close()
+
+    def test_persists_across_instances(self, tmp_path):
+        path = tmp_path / "cache.sqlite3"
+        first = PromptCache(path=path)
+        first.set("key", "response")
+        first.close()
+
+        second = PromptCache(path=path)
+        assert second.get("key") == "response"
+        second.close()
+
+    def test_disabled(self, tmp_path):
+        cache = PromptCache(path=tmp_path / "cache.sqlite3", enabled=False)
+        cache.set("key", "response")
+        assert not cache.enabled
+        assert cache.get("key") is None
+
+
+class TestSemanticCache:
+    def test_exact_match(self):
+        cache = SemanticCache()
+        cache.store("key", "response")
+        assert cache.lookup("key", "prompt") == ("response", None)
+        assert cache.stats["exact_hits"] == 1
+
+    def test_semantic_match_within_namespace(self):
+        vectors = {"原始提示詞": [1.0, 0.0], "相近提示詞": [0.99, 0.05], "無關提示詞": [0.0, 1.0]}
+        cache = SemanticCache(embed_fn=vectors.get, threshold=0.95)
+
+        response, vector = cache.lookup("k1", "原始提示詞", namespace="gemma")
+        assert response is None
+        cache.store("k1", "response", namespace="gemma", vector=vector)
+
+        assert cache.lookup("k2", "相近提示詞", namespace="gemma")[0] == "response"
+        assert cache.lookup("k3", "無關提示詞", namespace="gemma")[0] is None
+        assert cache.lookup("k4", "相近提示詞", namespace="llama")[0] is None
+        assert cache.stats == {"exact_hits": 0, "semantic_hits": 1, "misses": 3}
+
+
+class TestMinHashIndex:
+    def test_near_duplicate_match(self):
+        index = MinHashIndex(threshold=0.8)
+        index.add("ns", _TRANSCRIPT, "response")
+
+        near_duplicate = _TRANSCRIPT.replace("百分之五", "百分之六")
+        assert index.query("ns", near_duplicate)[0] == "response"
+
+    def test_unrelated_text_and_other_namespace(self):
+        index = MinHashIndex(threshold=0.8)
+        index.add("ns", _TRANSCRIPT, "response")
+
+        assert index.query("ns", "下午的專案進度報告由工程組說明測試排程與上線時程。")[0] is None
+        assert index.query("other", _TRANSCRIPT)[0] is None
+
+    def test_short_text_has_no_signature(self):
+        index = MinHashIndex(ngram=3)
+        assert index.signature("甲乙") is None
+        assert index.query("ns", "甲乙") == (None, None)
+
+
+class TestSegmentResponseCache:
+    def test_exact_hit_from_sqlite(self, tmp_path):
+        path = tmp_path / "cache.sqlite3"
+        key = make_prompt_key("gemma3:12b", 0.1, _TRANSCRIPT)
+        first = SegmentResponseCache(path=path)
+        first.set(key, _TRANSCRIPT, "response")
+        first.close()
+
+        second = SegmentResponseCache(path=path)
+        assert second.get(key, _TRANSCRIPT) == ("response", None)
+        second.close()
+
+    def test_near_duplicate_hit(self, tmp_path):
+        cache = SegmentResponseCache(path=tmp_path / "cache.sqlite3", near_duplicate_threshold=0.8)
+        key = make_prompt_key("gemma3:12b", 0.1, _TRANSCRIPT)
+        _, signature = cache.get(key, _TRANSCRIPT, namespace="coherence")
+        cache.set(key, _TRANSCRIPT, "response", namespace="coherence", signature=signature)
+
+        near_duplicate = _TRANSCRIPT.replace("百分之五", "百分之六")
+        other_key = make_prompt_key("gemma3:12b", 0.1, near_duplicate)
+        assert cache.get(other_key, near_duplicate, namespace="coherence")[0] == "response"
+        assert cache.get(other_key, near_duplicate, namespace="boundary")[0] is None
+        cache.close()
+
+    def test_exact_only_by_default(self, tmp_path):
+        cache = SegmentResponseCache(path=tmp_path / "cache.sqlite3")
+        cache.set("key", _TRANSCRIPT, "response")
+        near_duplicate = _TRANSCRIPT.replace("百分之五", "百分之六")
+        assert cache.get("other", near_duplicate) == (None, None)
+        cache.close()
+
+
+class TestAtomicWrite:
+    def test_write_replaces_target(self, tmp_path):
+        target = tmp_path / "out.txt"
+        target.write_bytes(b"old")
+        write_bytes_atomic(target, "新內容".encode("utf-8"))
+        assert target.read_text(encoding="utf-8") == "新內容"
+        assert os.listdir(tmp_path) == ["out.txt"]
+
+    def test_failed_write_removes_temp_file(self, tmp_path, monkeypatch):
+        target = tmp_path / "out.txt"
+        target.write_bytes(b"old")
+
+        def failing_replace(src, dst):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(llm_utils.os, "replace", failing_replace)
+        with pytest.raises(OSError):
+            write_bytes_atomic(target, b"new")
+        assert target.read_bytes() == b"old"
+        assert os.listdir(tmp_path) == ["out.txt"]
+
+    def test_write_json_numpy(self, tmp_path):
+        pytest.importorskip("orjson")
+        target = tmp_path / "out.json"
+        write_json(target, {"名稱": "會議", "scores": np.array([1.0, 2.0])})
+        text = target.read_text(encoding="utf-8")
+        assert "會議" in text
+        assert os.listdir(tmp_path) == ["out.json"]